@@ -1,43 +1,60 @@
 
+import time
+
+from cloudshell.shell.core.session.cloudshell_session import CloudShellSessionContext
 from cloudshell.traffic.driver import TrafficControllerDriver
 import cloudshell.traffic.tg_helper as tg_helper
 
 from ixn_handler import IxnHandler
+from ixn_metrics import MetricsProxy
+from ixn_coordinator import IxnCoordinator
 
 
 class IxNetworkControllerDriver(TrafficControllerDriver):
 
+    # Interval (seconds) between session pool health checks while keep alive is running.
+    keep_alive_check_interval = 60
+
     def __init__(self):
         super(self.__class__, self).__init__()
-        self.handler = IxnHandler()
+        handler = IxnHandler()
+        # Every command goes through the handler so timing the handler calls times the commands.
+        self.handler = MetricsProxy(handler, handler.metrics, 'command', log_summary=True)
 
     def load_config(self, context, ixn_config_file_name):
         """ Load IxNetwork configuration file and reserve ports.
 
         :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
         :param ixn_config_file_name: full path to IxNetwork configuration file (ixncfg).
+        :return: load status - cache hit (config already loaded), partial reload (only changed ports re-reserved) or
+            full reload.
         """
 
         self.logger.info('ixn_config_file_name = ' + ixn_config_file_name)
         super(self.__class__, self).load_config(context)
-        self.handler.load_config(context, ixn_config_file_name)
-        return ixn_config_file_name + ' loaded, ports reserved'
+        load_status = self.handler.load_config(context, ixn_config_file_name)
+        return ixn_config_file_name + ' loaded, ports reserved (' + load_status + ')'
 
-    def send_arp(self, context):
+    def send_arp(self, context, wait='False', timeout='60'):
         """ Send ARP for all objects.
 
         :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param wait: True - wait until ARP/ND of all NGPF and classic interfaces gateways is resolved, False - return
+            immediately.
+        :param timeout: max time (seconds) to wait for ARP/ND resolution.
         """
 
-        self.handler.send_arp()
+        return self.handler.send_arp(wait, timeout)
 
-    def start_protocols(self, context):
+    def start_protocols(self, context, wait='False', timeout='60'):
         """ Start all protocols.
 
         :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param wait: True - wait until all protocol sessions are up, False - return immediately.
+        :param timeout: max time (seconds) to wait for protocol sessions.
         """
 
-        self.handler.start_protocols()
+        return self.handler.start_protocols(wait, timeout)
 
     def stop_protocols(self, context):
         """ Stop all protocols.
@@ -47,14 +64,15 @@ class IxNetworkControllerDriver(TrafficControllerDriver):
 
         self.handler.stop_protocols()
 
-    def start_traffic(self, context, blocking):
+    def start_traffic(self, context, blocking, force_regenerate='False'):
         """ Start all L2/3 traffic items.
 
         :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
         :param blocking: True - wait until traffic stops, False - start traffic and return immediately.
+        :param force_regenerate: True - always regenerate and apply traffic, False - only if configuration changed.
         """
 
-        self.handler.start_traffic(blocking)
+        self.handler.start_traffic(blocking, force_regenerate)
 
     def stop_traffic(self, context):
         """ Stop all L2/3 traffic items.
@@ -64,27 +82,174 @@ class IxNetworkControllerDriver(TrafficControllerDriver):
 
         self.handler.stop_traffic()
 
-    def get_statistics(self, context, view_name, output_type):
+    def run_traffic(self, context, duration='0', view_names='', thresholds='', force_regenerate='False'):
+        """ Run L2/3 traffic, get final statistics and pass/fail verdict in one command.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param duration: time (seconds) to run traffic, 0 - wait until traffic stops.
+        :param view_names: comma separated list of statistics views to return, empty for Port Statistics and Traffic
+            Item Statistics.
+        :param thresholds: comma separated list of [view name:]statistic operator number, e.g.
+            Traffic Item Statistics: Loss % <= 0.1. Empty for no thresholds (verdict is always PASS).
+        :param force_regenerate: True - always regenerate and apply traffic, False - only if configuration changed.
+        :return: JSON {"verdict": PASS/FAIL, "failures": [failed thresholds],
+            "statistics": {view name: view statistics}}.
+        """
+
+        return self.handler.run_traffic(duration, view_names, thresholds, force_regenerate)
+
+    def get_statistics(self, context, view_name, output_type, columns='', rows='', mode='absolute',
+                       attachment_format='CSV'):
         """ Get statistics for specific view.
 
         :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
         :param view_name: requested statistics view name.
         :param output_type: JSON/CSV.
+        :param columns: comma separated list of requested statistics, empty for all statistics.
+        :param rows: comma separated list of requested object names or regular expressions, empty for all objects.
+        :param mode: Absolute - all statistics, Delta - only objects that changed since the previous delta read, with
+            deltas and rates of numeric statistics as <statistic> (delta) and <statistic> (rate/s).
+        :param attachment_format: CSV output attachment - CSV (statistics are also returned), GZIP or Columnar (only
+            summary with the attached file name is returned).
+        """
+
+        return self.handler.get_statistics(context, view_name, output_type, columns, rows, mode, attachment_format)
+
+    def get_statistics_batch(self, context, view_names, attach_zip='False'):
+        """ Get statistics for multiple views in one command.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param view_names: comma separated list of statistics view names.
+        :param attach_zip: True - attach all views as CSV files in single zip file, False - do not attach.
+        :return: JSON {view name: view statistics}.
         """
 
-        return self.handler.get_statistics(context, view_name, output_type)
+        return self.handler.get_statistics_batch(context, view_names, attach_zip)
 
-    def run_quick_test(self, context, test):
+    def start_sampling(self, context, view_names, interval='1', max_samples='3600'):
+        """ Start background sampling of statistics views, sampling stops when a new configuration is loaded.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param view_names: comma separated list of statistics view names.
+        :param interval: sampling interval in seconds.
+        :param max_samples: maximum number of samples to keep per view, older samples are overwritten.
+        """
+
+        self.handler.start_sampling(view_names, interval, max_samples)
+
+    def stop_sampling(self, context):
+        """ Stop background sampling of statistics views.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        """
+
+        self.handler.stop_sampling()
+
+    def get_sampled_statistics(self, context, output_type):
+        """ Get sampled statistics time series with per interval deltas and rates.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param output_type: JSON/CSV.
+        """
+
+        return self.handler.get_sampled_statistics(context, output_type)
+
+    def run_quick_test(self, context, test, blocking='True'):
         """ Run quick test.
 
         :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
-        :param test: name of quick test to run.
+        :param test: name of quick test to run, or comma separated list of quick tests to run one after the other.
+        :param blocking: True - wait until quick tests finish, False - queue quick tests and return job IDs.
         """
 
-        quick_test_resut = self.handler.run_quick_test(context, test)
-        tg_helper.write_to_reservation_out(context, 'Quick test result = ' + quick_test_resut)
+        quick_test_resut = self.handler.run_quick_test(context, test, blocking)
+        if tg_helper.is_blocking(blocking):
+            tg_helper.write_to_reservation_out(context, 'Quick test result = ' + quick_test_resut)
+        else:
+            tg_helper.write_to_reservation_out(context, 'Quick test job IDs = ' + quick_test_resut)
         return quick_test_resut
 
+    def get_quick_test_status(self, context, job_id):
+        """ Get quick test job status and progress.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param job_id: job ID returned by non blocking run_quick_test.
+        :return: JSON job status - state, progress, result and results path.
+        """
+
+        return self.handler.get_quick_test_status(job_id)
+
+    def wait_quick_test(self, context, job_id, timeout='3600'):
+        """ Wait for quick test job to end.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param job_id: job ID returned by non blocking run_quick_test.
+        :param timeout: max time (seconds) to wait.
+        :return: JSON job status.
+        """
+
+        return self.handler.wait_quick_test(job_id, timeout)
+
+    def stop_quick_test(self, context, job_id):
+        """ Stop running quick test job or cancel queued job.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param job_id: job ID returned by non blocking run_quick_test.
+        """
+
+        self.handler.stop_quick_test(job_id)
+
+    #
+    # Coordinator commands - run on all IxNetwork controllers in the reservation at once.
+    #
+
+    def load_config_all(self, context, configs):
+        """ Load configuration on all controllers and reserve ports.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param configs: JSON {controller name: full path to IxNetwork configuration file} for all controllers. Each
+            controller reserves the ports of its own configuration, by logical names.
+        :return: JSON {controller name: load_config output}.
+        """
+
+        return self._get_coordinator(context).load_config(configs)
+
+    def start_protocols_all(self, context, wait='False', timeout='60'):
+        """ Start all protocols on all controllers.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param wait: True - wait until all protocol sessions on all controllers are up, False - return immediately.
+        :param timeout: max time (seconds) to wait for protocol sessions.
+        :return: JSON {controller name: start_protocols output}.
+        """
+
+        return self._get_coordinator(context).start_protocols(wait, timeout)
+
+    def start_traffic_all(self, context, blocking, force_regenerate='False'):
+        """ Apply traffic on all controllers, then start traffic on all controllers at once.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param blocking: True - wait until traffic stops on all controllers, False - start traffic and return.
+        :param force_regenerate: True - always regenerate and apply traffic, False - only if configuration changed.
+        """
+
+        self._get_coordinator(context).start_traffic(blocking, force_regenerate)
+
+    def get_statistics_all(self, context, view_name):
+        """ Get statistics for specific view from all controllers, merged into one view.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param view_name: requested statistics view name.
+        :return: JSON {object name: {statistic: value}}, each object has Controller statistic. Objects names that
+            appear in more than one controller are prefixed with the controller name - controller name/object name.
+        """
+
+        return self._get_coordinator(context).get_statistics(view_name)
+
+    def _get_coordinator(self, context):
+        cs_api = MetricsProxy(CloudShellSessionContext(context).get_api(), self.handler.metrics, 'cloudshell')
+        return MetricsProxy(IxnCoordinator(self, context, cs_api, self.logger), self.handler.metrics, 'coordinator')
+
     #
     # Parent commands are not visible so we re define them in child.
     #
@@ -96,7 +261,13 @@ class IxNetworkControllerDriver(TrafficControllerDriver):
         super(self.__class__, self).cleanup()
 
     def keep_alive(self, context, cancellation_context):
-        super(self.__class__, self).keep_alive(context, cancellation_context)
+        last_check = time.time()
+        while not cancellation_context.is_cancelled:
+            time.sleep(2)
+            if time.time() - last_check > self.keep_alive_check_interval:
+                self.handler.keep_alive()
+                last_check = time.time()
+        self.cleanup()
 
     #
     # Hidden commands for developers only.
@@ -110,6 +281,24 @@ class IxNetworkControllerDriver(TrafficControllerDriver):
 
         return self.handler.get_session_id()
 
+    def apply_traffic(self, context, force_regenerate='False'):
+        """ Regenerate and apply traffic if configuration changed, used by start_traffic_all before synchronized start.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param force_regenerate: True - always regenerate and apply traffic.
+        """
+
+        self.handler.apply_traffic(force_regenerate)
+
+    def get_metrics(self, context):
+        """ Returns JSON with call count and latency histogram of each command, IxNetwork REST request and CloudShell
+        API call since the driver was created.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        """
+
+        return self.handler.get_metrics()
+
     def get_children(self, context, obj_ref, child_type):
         """ Returns all children of object.
 
@@ -141,3 +330,35 @@ class IxNetworkControllerDriver(TrafficControllerDriver):
         """
 
         self.handler.set_attribute(obj_ref, attr_name, attr_value)
+
+    def get_attributes_bulk(self, context, objects):
+        """ Returns attributes of multiple objects.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param objects: JSON list of {"obj_ref": valid IxNetwork object reference, "attributes": [attribute names]}.
+        :return: list of {"obj_ref": object reference, "attributes": {name: value}} or {"obj_ref", "error"}.
+        """
+
+        return self.handler.get_attributes_bulk(objects)
+
+    def set_attributes_bulk(self, context, objects):
+        """ Set attributes of multiple objects.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param objects: JSON list of {"obj_ref": valid IxNetwork object reference, "attributes": {name: value}}.
+        :return: list of {"obj_ref": object reference, "status": "ok"} or {"obj_ref", "error"}.
+        """
+
+        return self.handler.set_attributes_bulk(objects)
+
+    def get_object_tree(self, context, obj_ref, depth='1', child_types=''):
+        """ Returns object sub tree with attributes of all objects.
+
+        :type context: cloudshell.shell.core.driver_context.ResourceRemoteCommandContext
+        :param obj_ref: valid IxNetwork object reference of the sub tree root.
+        :param depth: number of levels to read below the root object.
+        :param child_types: comma separated list of child types to descend into, empty for all child types.
+        :return: {"obj_ref": reference, "attributes": {name: value}, "children": {child type: [sub trees]}}.
+        """
+
+        return self.handler.get_object_tree(obj_ref, depth, child_types)
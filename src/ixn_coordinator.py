@@ -0,0 +1,126 @@
+import json
+from collections import Counter, OrderedDict
+
+from cloudshell.api.cloudshell_api import InputNameValue
+
+from ixn_handler import run_concurrently
+
+
+class IxnCoordinator(object):
+    """ Run driver commands on all IxNetwork controllers of the reservation at once.
+
+    The controller that runs the coordinator command runs its own part locally, all other controllers run their part
+    through CloudShell ExecuteCommand so each controller keeps its own driver process and IxNetwork session (pyixnetwork
+    keeps process wide state so multiple sessions can not share one process).
+    """
+
+    def __init__(self, driver, context, api, logger):
+        """
+        :param driver: local IxNetworkControllerDriver.
+        :param context: local controller command context.
+        :param api: CloudShell API session.
+        """
+
+        self.driver = driver
+        self.context = context
+        self.api = api
+        self.logger = logger
+        self.reservation_id = context.reservation.reservation_id
+        self.local_name = context.resource.name
+        self.controllers = self._get_controllers()
+
+    def _get_controllers(self):
+        """ Returns sorted list of names of all controllers in the reservation with the same model as the local one. """
+
+        reservation = self.api.GetReservationDetails(self.reservation_id).ReservationDescription
+        controllers = set(s.Alias for s in reservation.Services if s.ServiceName == self.context.resource.model)
+        controllers.add(self.local_name)
+        return sorted(controllers)
+
+    def load_config(self, configs):
+        """ Load configuration on each controller, each controller reserves the ports of its own configuration.
+
+        :param configs: JSON {controller name: full path to configuration file}, must cover all controllers.
+        :return: {controller name: load_config output}.
+        """
+
+        configs = json.loads(configs)
+        unknown_controllers = set(configs) - set(self.controllers)
+        if unknown_controllers:
+            raise Exception('Controllers {} not found in reservation controllers {}'.
+                            format(sorted(unknown_controllers), self.controllers))
+        missing_controllers = set(self.controllers) - set(configs)
+        if missing_controllers:
+            raise Exception('No configuration for controllers {}'.format(sorted(missing_controllers)))
+        return self.run('load_config', {c: [('ixn_config_file_name', f)] for c, f in configs.items()})
+
+    def start_protocols(self, wait, timeout):
+        return self.run('start_protocols', self._same_inputs([('wait', wait), ('timeout', timeout)]))
+
+    def start_traffic(self, blocking, force_regenerate):
+        """ Start traffic on all controllers as close together as possible.
+
+        Traffic is regenerated and applied on all controllers first, then all controllers start traffic at once, so
+        the start is not spread by the (long and variable) apply time of each controller.
+        """
+
+        self.run('apply_traffic', self._same_inputs([('force_regenerate', force_regenerate)]))
+        return self.run('start_traffic', self._same_inputs([('blocking', blocking), ('force_regenerate', 'False')]))
+
+    def get_statistics(self, view_name):
+        """ Get view statistics of all controllers merged into one view.
+
+        Each row gets Controller statistic with the name of its controller. Objects names that appear in more than one
+        controller are prefixed with the controller name - <controller name>/<object name>.
+
+        :return: {object name: {caption: value}}.
+        """
+
+        controllers_stats = self.run('get_statistics', self._same_inputs([('view_name', view_name),
+                                                                         ('output_type', 'JSON')]))
+        controllers_stats = OrderedDict((c, _json_output(s)) for c, s in controllers_stats.items())
+        names_count = Counter(n for stats in controllers_stats.values() for n in stats)
+        statistics = OrderedDict()
+        for controller, stats in controllers_stats.items():
+            for name, row in sorted(stats.items()):
+                row['Controller'] = controller
+                statistics[name if names_count[name] == 1 else controller + '/' + name] = row
+        return statistics
+
+    def run(self, command, inputs):
+        """ Run command on all controllers concurrently.
+
+        :param command: driver command name.
+        :param inputs: {controller name: [(input name, value)]}.
+        :return: OrderedDict {controller name: command output} sorted by controller name.
+        """
+
+        outputs = OrderedDict()
+        errors = []
+        for controller, output, error in run_concurrently(lambda c: self._run_command(c, command, inputs[c]),
+                                                          sorted(inputs), len(inputs)):
+            if error:
+                self.logger.error('{} failed on controller {} - {}'.format(command, controller, error))
+                errors.append('{} - {}'.format(controller, error))
+            else:
+                outputs[controller] = output
+        if errors:
+            raise Exception('{} failed on controllers: {}'.format(command, '; '.join(errors)))
+        return outputs
+
+    def _run_command(self, controller, command, inputs):
+        if controller == self.local_name:
+            output = getattr(self.driver, command)(self.context, **dict(inputs))
+            return '' if output is None else output
+        self.logger.debug('Executing {} {} on controller {}'.format(command, inputs, controller))
+        return self.api.ExecuteCommand(self.reservation_id, controller, 'Service', command,
+                                       [InputNameValue(n, v) for n, v in inputs], False).Output
+
+    def _same_inputs(self, inputs):
+        return {c: inputs for c in self.controllers}
+
+
+def _json_output(output):
+    """ Returns command output as dictionary - local commands return dictionaries, remote commands return JSON. """
+
+    return json.loads(output) if isinstance(output, basestring) else output
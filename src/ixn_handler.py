@@ -1,132 +1,763 @@
 
-import json
 import csv
+import gzip
+import json
+import hashlib
 import io
+import tempfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
 
 from cloudshell.shell.core.session.cloudshell_session import CloudShellSessionContext
 from cloudshell.traffic.handler import TrafficHandler
 from cloudshell.traffic.tg_helper import (get_reservation_resources, get_address, is_blocking, attach_stats_csv,
-                                          get_family_attribute)
+                                          write_to_reservation_out)
+from cloudshell.traffic.quali_rest_api_helper import create_quali_api_instance
+
+from ixn_session_pool import session_pool
+from ixn_metrics import Metrics, MetricsProxy, time_rest_requests
+
+PORT_MODELS = ('Generic Traffic Generator Port',
+               'PerfectStorm Chassis Shell 2G.GenericTrafficGeneratorPort',
+               'Ixia Chassis Shell 2G.GenericTrafficGeneratorPort')
+
+CONFIG_CACHE_HIT = 'cache hit'
+CONFIG_PARTIAL_RELOAD = 'partial reload'
+CONFIG_FULL_RELOAD = 'full reload'
+
+
+class LazyModule(object):
+    """ Module proxy that imports the module on first attribute access. """
+
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+
+    def __getattr__(self, attribute):
+        if self.module is None:
+            self.module = __import__(self.name, globals(), {}, ['__name__'])
+        return getattr(self.module, attribute)
+
+
+# Heavy modules are imported on first use since CloudShell starts a new driver process for each resource.
+tgn_utils = LazyModule('trafficgenerator.tgn_utils')
+ixn_app = LazyModule('ixnetwork.ixn_app')
+ixn_statistics = LazyModule('ixn_statistics')
+ixn_sampler = LazyModule('ixn_sampler')
+ixn_quick_test = LazyModule('ixn_quick_test')
+ixn_protocols = LazyModule('ixn_protocols')
+
+
+def run_concurrently(func, items, max_workers):
+    """ Run func on each item using a bounded pool of worker threads.
+
+    :param func: function that accepts a single item.
+    :param items: list of items to process.
+    :param max_workers: maximum number of concurrent workers.
+    :return: list of (item, result, exception) tuples in items order, exception is None on success.
+    """
+
+    def _run(item):
+        try:
+            return item, func(item), None
+        except Exception as e:
+            return item, None, e
+
+    if not items:
+        return []
+    pool = ThreadPool(min(max_workers, len(items)))
+    try:
+        return pool.map(_run, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _config_fingerprint(config_file_name):
+    """ Returns hash of configuration file content. """
+
+    config_hash = hashlib.sha1()
+    with open(config_file_name, 'rb') as config_file:
+        for chunk in iter(lambda: config_file.read(64 * 1024), b''):
+            config_hash.update(chunk)
+    return config_hash.hexdigest()
+
 
-from trafficgenerator.tgn_utils import ApiType
-from ixnetwork.ixn_app import init_ixn
-from ixnetwork.ixn_statistics_view import IxnStatisticsView, IxnFlowStatistics
+def _split_list(value):
+    """ Split comma separated command parameter into list of stripped, non empty, values. """
+
+    return [v.strip() for v in value.split(',') if v.strip()] if value else []
+
+
+def _get_logical_name(resource):
+    """ Get port Logical Name from resource details, supporting 1st and 2nd gen attribute namespaces. """
+
+    for attribute in resource.ResourceAttributes:
+        if attribute.Name == 'Logical Name' or attribute.Name.endswith('.Logical Name'):
+            return attribute.Value.strip()
+    return ''
 
 
 class IxnHandler(TrafficHandler):
 
+    # Maximum number of ports reserved concurrently.
+    max_port_workers = 16
+    # Time (seconds) to wait for all ports to come up, shared by all ports.
+    ports_up_timeout = 80
+    # Interval (seconds) between polls of the states of ports that are not up yet.
+    ports_up_poll_interval = 1
+    # Maximum number of statistics views read concurrently.
+    max_stats_workers = 8
+    # Memory cap (bytes) of each sampled statistics view buffer.
+    max_sampling_bytes = 64 * 1024 * 1024
+    # Max time (seconds) to wait for quick test to finish.
+    quick_test_timeout = 3600 * 24
+    # Max time (seconds) teardown waits for the running quick test to stop before the session is released.
+    quick_test_stop_timeout = 60
+    # Maximum number of concurrent REST requests for bulk object commands.
+    max_rest_workers = 16
+    # Compression level of gzip statistics attachments, 1 (fastest) to 9 (smallest).
+    gzip_level = 6
+    # Statistics views read by run_traffic when no views are requested.
+    run_traffic_views = ('Port Statistics', 'Traffic Item Statistics')
+
+    def __init__(self):
+        super(IxnHandler, self).__init__()
+        # Call counts and latencies of driver commands, IxNetwork and CloudShell API calls.
+        self.metrics = Metrics()
+
     def initialize(self, context, logger):
 
         self.logger = logger
+        # {'fingerprint': config file content hash, 'ports': {logical name: physical address}} of the loaded config.
+        self.loaded_config = None
+        # True if traffic may have changed since the last regenerate/apply.
+        self.traffic_dirty = True
+        self.sampler = None
+        # {view name: StatsRingBuffer} of the last sampling session.
+        self.sampled_stats = OrderedDict()
+        # {view name: (read time, {object name: {caption: number}})} of the last delta read of each view.
+        self.last_stats = {}
+        self.quick_test_runner = None
+        # {(root object reference, depth, child types): object tree} cached until the configuration changes.
+        self.object_trees = {}
+        # {SESSIONS: [obj_ref], ARP: [obj_ref]} of the loaded configuration, found on first protocols wait.
+        self.protocol_objects = None
+        # True - release ports and return session to pool in background thread so cleanup returns immediately.
+        self.background_teardown = tgn_utils.is_true(context.resource.attributes.get('Background Teardown', 'False'))
 
         tcl_server = context.resource.attributes['Controller Address']
         tcl_port = int(context.resource.attributes['Controller TCP Port'])
 
-        self.ixn = init_ixn(ApiType.rest, self.logger)
-
         if tcl_server.lower() in ('na', ''):
             tcl_server = 'localhost'
         if not tcl_port:
             tcl_port = 11009
-        if tcl_port == 443:
-            user = context.resource.attributes['User']
-            encripted_password = context.resource.attributes['Password']
-            password = CloudShellSessionContext(context).get_api().DecryptPassword(encripted_password).Value
-            auth = (user, password)
-        else:
-            auth = None
-        self.logger.debug("connecting to tcl server {} at {} port with auth {}".format(tcl_server, tcl_port, auth))
-        self.ixn.connect(api_server=tcl_server, api_port=tcl_port, auth=auth)
+        user = context.resource.attributes['User'] if tcl_port == 443 else None
+        self.session_key = (tcl_server, tcl_port, user)
+
+        def _connect():
+            ixn = ixn_app.init_ixn(tgn_utils.ApiType.rest, self.logger)
+            if tcl_port == 443:
+                encripted_password = context.resource.attributes['Password']
+                password = self._get_cs_api(context).DecryptPassword(encripted_password).Value
+                auth = (user, password)
+            else:
+                auth = None
+            self.logger.debug("connecting to tcl server {} at {} port with auth {}".format(tcl_server, tcl_port, auth))
+            ixn.connect(api_server=tcl_server, api_port=tcl_port, auth=auth)
+            return ixn
+
+        ixn = session_pool.acquire(self.session_key, _connect, self.logger)
+        time_rest_requests(ixn.api, self.metrics)
+        self.ixn = MetricsProxy(ixn, self.metrics, 'ixn')
 
     def tearDown(self):
-        for port in self.ixn.root.get_objects_by_type('vport'):
-            port.release()
-        self.ixn.disconnect()
+        self.stop_sampling()
+        self._config_changed()
+        if self.background_teardown:
+            threading.Thread(target=self._release_session_in_background, name='IxnTearDown').start()
+        else:
+            self._release_session()
+
+    def _release_session(self):
+        """ Stop quick tests, release all ports and return the session to the pool.
+
+        The session is discarded if the running quick test did not stop or ports release failed.
+        """
+
+        released = False
+        try:
+            self._stop_quick_tests()
+            self._release_ports(list(self.ixn.root.get_objects_by_type('vport')))
+            released = True
+        finally:
+            if released:
+                session_pool.release(self.session_key, self.ixn.wrapped)
+                self.logger.info('Session released')
+            else:
+                session_pool.discard(self.session_key, self.ixn.wrapped)
+                self.logger.warning('Session discarded')
 
-    def load_config(self, context, ixia_config_file_name):
+    def _stop_quick_tests(self):
+        """ Stop all quick test jobs and end the runner thread so it does not use the session after release. """
+
+        if self.quick_test_runner:
+            self.quick_test_runner.shutdown(self.quick_test_stop_timeout)
+            if self.quick_test_runner.is_alive():
+                raise Exception('Quick test still running {} seconds after stop'.format(self.quick_test_stop_timeout))
+            self.quick_test_runner = None
+
+    def _release_session_in_background(self):
+        try:
+            self._release_session()
+        except Exception as e:
+            self.logger.error('Background teardown failed - {}'.format(e))
+
+    def keep_alive(self):
+        """ Periodic session pool maintenance - disconnect expired and unhealthy idle sessions. """
 
+        session_pool.check_idle()
+
+    def load_config(self, context, ixia_config_file_name):
+        """ Load configuration and reserve ports.
+
+        If the same configuration (by content) is already loaded, skip the load and re-reserve only the ports whose
+        physical location changed. Full load stops statistics sampling as the sampled views belong to the old
+        configuration, samples taken so far can still be read.
+
+        :return: CONFIG_CACHE_HIT, CONFIG_PARTIAL_RELOAD or CONFIG_FULL_RELOAD.
+        """
+
+        fingerprint = _config_fingerprint(ixia_config_file_name)
+        reservation_ports = self._get_reservation_ports(context)
+
+        if self.loaded_config and self.loaded_config['fingerprint'] == fingerprint:
+            ports_addresses = self._map_ports(self.ixn.root.get_objects_by_type('vport'), reservation_ports)
+            changed_ports = [(port, address) for port, address in ports_addresses if
+                             self.loaded_config['ports'].get(port.obj_name()) != address]
+            if not changed_ports:
+                self.logger.info('Configuration {} already loaded'.format(ixia_config_file_name))
+                return CONFIG_CACHE_HIT
+            self._config_changed()
+            self._raise_on_errors(self._release_ports([port for port, _ in changed_ports]))
+            self._reserve_ports(changed_ports)
+            self._set_loaded_config(fingerprint, ports_addresses)
+            self.logger.info("Port Reservation Completed")
+            return CONFIG_PARTIAL_RELOAD
+
+        self._config_changed()
+        self.stop_sampling()
+        self.last_stats = {}
         self.ixn.new_config()
         self.ixn.load_config(ixia_config_file_name)
         config_ports = self.ixn.root.get_children('vport')
 
-        for port in config_ports:
-            port.release()
+        self._raise_on_errors(self._release_ports(config_ports))
 
-        reservation_id = context.reservation.reservation_id
-        my_api = CloudShellSessionContext(context).get_api()
+        ports_addresses = self._map_ports(config_ports, reservation_ports)
+        self._reserve_ports(ports_addresses)
+        self._set_loaded_config(fingerprint, ports_addresses)
+
+        self.logger.info("Port Reservation Completed")
+        return CONFIG_FULL_RELOAD
+
+    def _protocols_changed(self):
+        """ Invalidate caches that depend on protocols state - traffic and objects sessions/ARP attributes. """
+
+        self.traffic_dirty = True
+        self.object_trees = {}
+
+    def _config_changed(self):
+        """ Invalidate all caches that depend on the configuration. """
+
+        self.loaded_config = None
+        self.traffic_dirty = True
+        self.object_trees = {}
+        self.protocol_objects = None
 
-        reservation_ports = {}
-        for port in get_reservation_resources(my_api, reservation_id,
-                                              'Generic Traffic Generator Port',
-                                              'PerfectStorm Chassis Shell 2G.GenericTrafficGeneratorPort',
-                                              'Ixia Chassis Shell 2G.GenericTrafficGeneratorPort'):
-            reservation_ports[get_family_attribute(my_api, port, 'Logical Name').Value.strip()] = port
+    def _map_ports(self, config_ports, reservation_ports):
+        """ Map configuration ports to reservation ports physical addresses by logical name.
 
+        :param reservation_ports: dictionary {logical name: physical address}.
+        :return: list of (vport object, physical address) tuples.
+        """
+
+        ports_addresses = []
         for port in config_ports:
             name = port.obj_name()
             if name in reservation_ports:
-                address = get_address(reservation_ports[name])
+                address = reservation_ports[name]
                 self.logger.debug('Logical Port {} will be reserved on Physical location {}'.format(name, address))
-                port.reserve(address, wait_for_up=False)
+                ports_addresses.append((port, address))
             else:
                 self.logger.error('Configuration port "{}" not found in reservation ports {}'.
                                   format(port, reservation_ports.keys()))
                 raise Exception('Configuration port "{}" not found in reservation ports {}'.
                                 format(port, reservation_ports.keys()))
+        return ports_addresses
 
-        for port in config_ports:
-            port.wait_for_states(40, 'up')
+    def _set_loaded_config(self, fingerprint, ports_addresses):
+        self.loaded_config = {'fingerprint': fingerprint,
+                              'ports': {port.obj_name(): address for port, address in ports_addresses}}
 
-        self.logger.info("Port Reservation Completed")
+    def _get_reservation_ports(self, context):
+        """ Get logical name to physical address index of all traffic generator ports in the reservation.
+
+        Logical names are read with one GetResourceDetails per chassis, all chassis concurrently, instead of one
+        GetAttributeValue per port. Logical names can change during the reservation so they are read on every call.
+
+        :return: dictionary {logical name: physical address}.
+        """
 
-    def send_arp(self):
+        reservation_id = context.reservation.reservation_id
+        my_api = self._get_cs_api(context)
+
+        ports_by_name = {port.Name: port for port in get_reservation_resources(my_api, reservation_id, *PORT_MODELS)}
+        chassis_names = sorted(set(name.split('/')[0] for name in ports_by_name))
+        logical_names = {}
+        for chassis_name, chassis, error in run_concurrently(my_api.GetResourceDetails, chassis_names,
+                                                             self.max_port_workers):
+            if error:
+                self.logger.error('Failed to read chassis {} details - {}'.format(chassis_name, error))
+                raise Exception('Failed to read chassis {} details - {}'.format(chassis_name, error))
+            resources = [chassis]
+            while resources:
+                resource = resources.pop()
+                resources.extend(resource.ChildResources)
+                if resource.Name in ports_by_name:
+                    logical_names[resource.Name] = _get_logical_name(resource)
+
+        return {logical_names.get(name, ''): get_address(port) for name, port in ports_by_name.items()}
+
+    def _release_ports(self, ports):
+        """ Release ports, all ports in parallel.
+
+        :return: list of errors, empty list if all ports released.
+        """
+
+        errors = []
+        for port, _, error in run_concurrently(lambda p: p.release(), ports, self.max_port_workers):
+            if error:
+                self.logger.error('Failed to release port {} - {}'.format(port.obj_name(), error))
+                errors.append('Failed to release port {} - {}'.format(port.obj_name(), error))
+        return errors
+
+    def _get_cs_api(self, context):
+        return MetricsProxy(CloudShellSessionContext(context).get_api(), self.metrics, 'cloudshell')
+
+    def _raise_on_errors(self, errors):
+        if errors:
+            raise Exception('; '.join(errors))
+
+    def _reserve_ports(self, ports_addresses):
+        """ Reserve ports and wait for all ports to come up.
+
+        All ports are reserved first, without waiting for up, then the states of all reserved ports are polled
+        together, so link up of all ports overlaps and the total wait is bounded by ports_up_timeout regardless of the
+        number of ports.
+
+        :param ports_addresses: list of (vport object, physical address) tuples.
+        """
+
+        # Chassis objects are created on first access, so add them serially before the workers look them up.
+        for hostname in set(address.split('/')[0] for _, address in ports_addresses):
+            self.ixn.root.hw.get_chassis(hostname)
+
+        start_time = time.time()
+        deadline = start_time + self.ports_up_timeout
+
+        errors = []
+        pending = []
+        for (port, address), _, error in run_concurrently(lambda pa: pa[0].reserve(pa[1], wait_for_up=False),
+                                                          ports_addresses, self.max_port_workers):
+            if error:
+                self.logger.error('Failed to reserve port {} on {} - {}'.format(port.obj_name(), address, error))
+                errors.append('{} on {} - {}'.format(port.obj_name(), address, error))
+            else:
+                pending.append((port, address))
+
+        states = {}
+        while pending:
+            still_pending = []
+            for (port, address), state, error in run_concurrently(lambda pa: pa[0].get_attribute('state'), pending,
+                                                                  self.max_port_workers):
+                if not error and state == 'up':
+                    self.logger.info('Port {} on {} is up after {:.2f} seconds'.
+                                     format(port.obj_name(), address, time.time() - start_time))
+                else:
+                    states[port] = error if error else state
+                    still_pending.append((port, address))
+            pending = still_pending
+            if pending and time.time() >= deadline:
+                for port, address in pending:
+                    self.logger.error('Port {} on {} is {} after {} seconds'.
+                                      format(port.obj_name(), address, states[port], self.ports_up_timeout))
+                    errors.append('{} on {} - port is {} after {} seconds'.
+                                  format(port.obj_name(), address, states[port], self.ports_up_timeout))
+                break
+            if pending:
+                time.sleep(min(self.ports_up_poll_interval, max(deadline - time.time(), 0)))
+        if errors:
+            raise Exception('Failed to reserve ports: {}'.format('; '.join(errors)))
+
+    def send_arp(self, wait='False', timeout='60'):
+        """ Send ARP/ND for all objects and optionally wait until ARP/ND is resolved.
+
+        :param wait: True - wait until all NGPF and classic interfaces IPv4/IPv6 gateways are resolved, False - return
+            immediately.
+        :param timeout: max time (seconds) to wait.
+        :return: time to resolve message if wait else None.
+        """
+
+        self._protocols_changed()
         self.ixn.send_arp_ns()
+        if tgn_utils.is_true(wait):
+            wait_time = self._wait_protocols(ixn_protocols.ARP, float(timeout))
+            if wait_time is None:
+                return 'ARP/ND sent, no IPv4/IPv6 gateways found to wait for'
+            return 'ARP/ND resolved after {:.2f} seconds'.format(wait_time)
+
+    def start_protocols(self, wait='False', timeout='60'):
+        """ Start all protocols and optionally wait until all sessions are up.
 
-    def start_protocols(self):
+        :param wait: True - wait until all protocol sessions are up, False - return immediately.
+        :param timeout: max time (seconds) to wait.
+        :return: time to up message if wait else None.
+        """
+
+        self._protocols_changed()
         self.ixn.protocols_start()
+        if tgn_utils.is_true(wait):
+            wait_time = self._wait_protocols(ixn_protocols.SESSIONS, float(timeout))
+            if wait_time is None:
+                return 'Protocols started, no protocol sessions found to wait for'
+            return 'Protocols up after {:.2f} seconds'.format(wait_time)
+
+    def _wait_protocols(self, kind, timeout):
+        """ Wait until all objects of the requested kind are ready.
+
+        :return: time (seconds) until all objects were ready, None if there are no objects to wait for.
+        """
+
+        waiter = ixn_protocols.ProtocolsWaiter(self.ixn.api, self.logger, run_concurrently, self.max_rest_workers)
+        if self.protocol_objects is None:
+            vports_refs = [p.ref for p in self.ixn.root.get_objects_by_type('vport')]
+            self.protocol_objects = waiter.find_objects(self.ixn.root.ref, vports_refs)
+        objects_refs = self.protocol_objects[kind]
+        if not objects_refs:
+            self.logger.warning('No {} objects found to wait for'.format(kind))
+            return None
+        wait_time = waiter.wait(objects_refs, kind, timeout)
+        self.logger.info('{} {} objects ready after {:.2f} seconds'.format(len(objects_refs), kind, wait_time))
+        return wait_time
 
     def stop_protocols(self):
+        self._protocols_changed()
         self.ixn.protocols_stop()
 
-    def start_traffic(self, blocking):
-        self.ixn.regenerate()
-        self.ixn.traffic_apply()
+    def start_traffic(self, blocking, force_regenerate='False'):
+        """ Start traffic, regenerate and apply traffic only if something changed since the last apply.
+
+        :param force_regenerate: True - always regenerate and apply traffic before start.
+        """
+
+        self.apply_traffic(force_regenerate)
         self.ixn.l23_traffic_start(is_blocking(blocking))
 
+    def apply_traffic(self, force_regenerate='False'):
+        """ Regenerate and apply traffic if something changed since the last apply, so the next start is immediate.
+
+        :param force_regenerate: True - always regenerate and apply traffic.
+        """
+
+        if self.traffic_dirty or tgn_utils.is_true(force_regenerate):
+            # Regenerate re-creates the traffic items high level streams and config elements.
+            self.object_trees = {}
+            self.ixn.regenerate()
+            self.ixn.traffic_apply()
+            self.traffic_dirty = False
+        else:
+            self.logger.debug('Traffic not changed since last apply, skipping regenerate/apply')
+
     def stop_traffic(self):
         self.ixn.l23_traffic_stop()
 
-    def get_statistics(self, context, view_name, output_type):
+    def get_statistics(self, context, view_name, output_type, columns='', rows='', mode='absolute',
+                       attachment_format='csv'):
+        """ Get view statistics.
 
-        if view_name == 'Flow Statistics':
-            stats_obj = IxnFlowStatistics(self.ixn.root)
-        else:
-            stats_obj = IxnStatisticsView(self.ixn.root, view_name)
-
-        stats_obj.read_stats()
-        statistics = stats_obj.get_all_stats()
-        if output_type.lower().strip() == 'json':
-            statistics_str = json.dumps(statistics, indent=4, sort_keys=True, ensure_ascii=False)
-            return json.loads(statistics_str)
-        elif output_type.lower().strip() == 'csv':
-            output = io.BytesIO()
-            w = csv.DictWriter(output, stats_obj.captions)
-            w.writeheader()
-            for obj_name in statistics:
-                w.writerow(statistics[obj_name])
-            attach_stats_csv(context, self.logger, view_name, output.getvalue().strip())
-            return output.getvalue().strip()
+        The view is read page by page and CSV rows are streamed into a temporary file that is attached to the
+        reservation, so the view is never held in memory as a whole while reading.
+
+        :param columns: comma separated list of requested captions, empty for all captions.
+        :param rows: comma separated list of requested object names or name regular expressions, empty for all rows.
+        :param mode: absolute - all rows, delta - only rows that changed since the previous delta read of the view,
+            with per row deltas and rates.
+        :param attachment_format: CSV output attachment format - csv (statistics are also returned), gzip (gzipped CSV)
+            or columnar (see ixn_statistics.write_stats_columnar). For gzip/columnar only summary is returned.
+        """
+
+        output_type = output_type.lower().strip()
+        if output_type not in ('json', 'csv'):
+            raise Exception('Output type should be CSV/JSON - got "{}"'.format(output_type))
+        mode = mode.lower().strip()
+        if mode not in ('absolute', 'delta'):
+            raise Exception('Mode should be absolute/delta - got "{}"'.format(mode))
+        attachment_format = attachment_format.lower().strip()
+        if attachment_format not in ('csv', 'gzip', 'columnar'):
+            raise Exception('Attachment format should be CSV/GZIP/Columnar - got "{}"'.format(attachment_format))
+
+        stats_obj = ixn_statistics.IxnStatisticsStream(self.ixn.root, view_name)
+        stats = stats_obj.iter_stats(_split_list(columns), _split_list(rows))
+        captions = stats_obj.captions
+        if mode == 'delta':
+            read_time = time.time()
+            snapshot = {}
+            captions, stats = ixn_statistics.delta_stats(stats, captions, self.last_stats.get(view_name), read_time,
+                                                         snapshot)
+
+        if output_type == 'json':
+            statistics = dict(stats)
+        elif attachment_format != 'csv':
+            statistics = self._attach_statistics(context, view_name, captions, stats, attachment_format)
         else:
+            with tempfile.TemporaryFile() as output:
+                ixn_statistics.write_stats_csv(output, captions, stats)
+                output.seek(0)
+                with self.metrics.timed('cloudshell.attach_stats_csv'):
+                    attach_stats_csv(context, self.logger, view_name, output)
+                output.seek(0)
+                statistics = output.read().strip()
+
+        if mode == 'delta':
+            self.last_stats[view_name] = (read_time, snapshot)
+        return statistics
+
+    def _attach_statistics(self, context, view_name, captions, stats, attachment_format):
+        """ Attach statistics as gzipped CSV or columnar file.
+
+        :return: summary with the attached file name.
+        """
+
+        with tempfile.TemporaryFile() as output:
+            if attachment_format == 'gzip':
+                with gzip.GzipFile(fileobj=output, mode='wb', compresslevel=self.gzip_level) as gzip_output:
+                    rows_count = ixn_statistics.write_stats_csv(gzip_output, captions, stats)
+                suffix = 'csv.gz'
+            else:
+                rows_count = ixn_statistics.write_stats_columnar(output, view_name, captions, stats)
+                suffix = 'columnar.zip'
+            size = output.tell()
+            output.seek(0)
+            file_name = self._attach_file(context, view_name, suffix, output)
+        return '{}: {} rows, {} columns saved in attached file {} ({} bytes)'.format(view_name, rows_count,
+                                                                                   len(captions), file_name, size)
+
+    def get_statistics_batch(self, context, view_names, attach_zip='False'):
+        """ Get statistics of multiple views, all views are read concurrently to keep counters consistent in time.
+
+        :param view_names: comma separated list of view names.
+        :param attach_zip: True - attach all views as CSV files in a single zip file, False - do not attach.
+        :return: dictionary {view name: {object name: {caption: value}}}.
+        """
+
+        views_stats = self._read_views(_split_list(view_names))
+        if tgn_utils.is_true(attach_zip):
+            with tempfile.TemporaryFile() as output:
+                with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as stats_zip:
+                    for view_name, captions, stats in views_stats:
+                        view_output = io.BytesIO()
+                        ixn_statistics.write_stats_csv(view_output, captions, stats)
+                        stats_zip.writestr(view_name.replace(' ', '_') + '.csv', view_output.getvalue())
+                output.seek(0)
+                self._attach_file(context, 'Statistics', 'zip', output)
+
+        return {view_name: dict(stats) for view_name, _, stats in views_stats}
+
+    def _read_views(self, view_names):
+        """ Read statistics views concurrently.
+
+        The views objects are found first, serially, then only the views pages are read concurrently.
+
+        :param view_names: list of view names, duplicate names are read once.
+        :return: list of (view name, captions, [(object name, {caption: value})]).
+        """
+
+        view_names = [v for i, v in enumerate(view_names) if v not in view_names[:i]]
+        views = ixn_statistics.find_views(self.ixn.root, view_names)
+
+        def _read_view(view_name):
+            if view_name not in views:
+                raise Exception('Statistics view "{}" not found'.format(view_name))
+            stats_obj = ixn_statistics.IxnStatisticsStream(self.ixn.root, view_name, views[view_name])
+            stats = list(stats_obj.iter_stats())
+            return stats_obj.captions, stats
+
+        views_stats = []
+        errors = []
+        for view_name, captions_stats, error in run_concurrently(_read_view, view_names, self.max_stats_workers):
+            if error:
+                self.logger.error('Failed to read statistics view {} - {}'.format(view_name, error))
+                errors.append('{} - {}'.format(view_name, error))
+            else:
+                views_stats.append((view_name, captions_stats[0], captions_stats[1]))
+        if errors:
+            raise Exception('Failed to read statistics views: {}'.format('; '.join(errors)))
+        return views_stats
+
+    def run_traffic(self, duration='0', view_names='', thresholds='', force_regenerate='False'):
+        """ Run traffic, read final statistics and check pass/fail thresholds in one command.
+
+        :param duration: time (seconds) to run traffic before stopping it, 0 - wait until traffic stops.
+        :param view_names: comma separated list of views to read after traffic stops, empty for run_traffic_views.
+            Views of view specific thresholds are always read.
+        :param thresholds: comma separated list of [view name:]statistic operator number, for example
+            Traffic Item Statistics: Loss % <= 0.1. Each threshold is checked on every row of the views it applies to.
+        :return: {'verdict': PASS/FAIL, 'failures': [failure description], 'statistics': {view name: view statistics}}.
+        """
+
+        # Parse thresholds before running traffic so bad thresholds fail fast.
+        thresholds = ixn_statistics.parse_thresholds(_split_list(thresholds))
+        view_names = _split_list(view_names) or list(self.run_traffic_views)
+        view_names += [t[0] for t in thresholds if t[0]]
+        duration = float(duration)
+
+        start_time = time.time()
+        self.start_traffic(str(not duration), force_regenerate)
+        if duration:
+            time.sleep(max(0, start_time + duration - time.time()))
+            self.stop_traffic()
+        self.logger.info('Traffic ran for {:.2f} seconds'.format(time.time() - start_time))
+
+        statistics = {v: dict(stats) for v, _, stats in self._read_views(view_names)}
+        failures = ixn_statistics.check_thresholds(thresholds, statistics)
+        for failure in failures:
+            self.logger.info('Threshold failed - ' + failure)
+        return {'verdict': 'FAIL' if failures else 'PASS', 'failures': failures, 'statistics': statistics}
+
+    def start_sampling(self, view_names, interval='1', max_samples='3600'):
+        """ Start background sampling of statistics views, previous samples are discarded.
+
+        :param view_names: comma separated list of view names.
+        :param interval: sampling interval in seconds.
+        :param max_samples: number of samples to keep per view, older samples are overwritten.
+        """
+
+        self.stop_sampling()
+        views = OrderedDict((v, ixn_statistics.IxnStatisticsStream(self.ixn.root, v)) for v in _split_list(view_names))
+        self.sampled_stats = OrderedDict((v, ixn_sampler.StatsRingBuffer(int(max_samples), self.max_sampling_bytes))
+                                         for v in views)
+        self.sampler = ixn_sampler.StatsSampler(lambda v: list(views[v].iter_stats()), list(views),
+                                                float(interval), self.sampled_stats, self.logger)
+        self.sampler.start()
+
+    def stop_sampling(self):
+        if self.sampler:
+            self.sampler.stop()
+            self.sampler = None
+
+    def get_sampled_statistics(self, context, output_type):
+        """ Get sampled statistics time series with per interval deltas and rates.
+
+        :return: JSON - {view name: {'timestamps': [], 'statistics': {object name: {caption: {'values': [],
+            'deltas': [], 'rates': []}}}}}, CSV - one row per view/object/statistic/sample.
+        """
+
+        output_type = output_type.lower().strip()
+        if output_type not in ('json', 'csv'):
             raise Exception('Output type should be CSV/JSON - got "{}"'.format(output_type))
 
-    def run_quick_test(self, context, test):
-
-        self.ixn.quick_test_apply(test)
-        return self.ixn.quick_test_start(test, blocking=True, timeout=3600 * 24)
+        views_series = [(v, b.get_series()) for v, b in self.sampled_stats.items()]
+        if output_type == 'json':
+            sampled_stats = {}
+            for view_name, (timestamps, series) in views_series:
+                statistics = {}
+                for (name, caption), (values, deltas, rates) in series.items():
+                    statistics.setdefault(name, {})[caption] = {'values': values, 'deltas': deltas, 'rates': rates}
+                sampled_stats[view_name] = {'timestamps': timestamps, 'statistics': statistics}
+            return sampled_stats
+
+        with tempfile.TemporaryFile() as output:
+            w = csv.writer(output)
+            w.writerow(['View', 'Object', 'Statistic', 'Time', 'Value', 'Delta', 'Rate'])
+            for view_name, (timestamps, series) in views_series:
+                for (name, caption), (values, deltas, rates) in sorted(series.items()):
+                    for row in zip(timestamps, values, deltas, rates):
+                        w.writerow([view_name, name, caption] + ['' if v is None else v for v in row])
+            output.seek(0)
+            with self.metrics.timed('cloudshell.attach_stats_csv'):
+                attach_stats_csv(context, self.logger, 'Sampled Statistics', output)
+            output.seek(0)
+            return output.read().strip()
+
+    def _attach_file(self, context, name, suffix, output):
+        """ Attach file to reservation, same as attach_stats_csv but for any file type.
+
+        :param output: file content, string or file object.
+        :return: attached file name.
+        """
+
+        quali_api_helper = MetricsProxy(create_quali_api_instance(context, self.logger), self.metrics, 'quali')
+        quali_api_helper.login()
+        full_file_name = name.replace(' ', '_') + '_' + time.ctime().replace(' ', '_') + '.' + suffix
+        quali_api_helper.upload_file(context.reservation.reservation_id, file_name=full_file_name, file_stream=output)
+        with self.metrics.timed('cloudshell.write_to_reservation_out'):
+            write_to_reservation_out(context, 'Statistics saved in attached file - ' + full_file_name)
+        return full_file_name
+
+    def run_quick_test(self, context, test, blocking='True'):
+        """ Run quick tests, multiple tests run one after the other in the order they were queued.
+
+        :param test: comma separated list of quick test names.
+        :param blocking: True - wait for all tests to finish and return results, False - return job IDs immediately.
+        """
+
+        if not self.quick_test_runner:
+            self.quick_test_runner = ixn_quick_test.QuickTestRunner(self.ixn, self.logger, self.quick_test_timeout)
+            self.quick_test_runner.start()
+        # Quick test apply/start rewrites the L2/3 traffic items, so the loaded configuration is no longer the file's.
+        self._config_changed()
+        jobs = [self.quick_test_runner.submit(t) for t in _split_list(test)]
+        if not tgn_utils.is_true(blocking):
+            return ','.join(job.job_id for job in jobs)
+
+        for job in jobs:
+            job.done.wait()
+            if job.error:
+                raise Exception('Quick test {} failed - {}'.format(job.test, job.error))
+        return ', '.join(str(job.result) for job in jobs)
+
+    def get_quick_test_status(self, job_id):
+        return self._get_quick_test_runner().get_status(job_id)
+
+    def wait_quick_test(self, job_id, timeout):
+        """ Wait for quick test job to end.
+
+        :param timeout: max time (seconds) to wait.
+        :return: job status.
+        """
+
+        self._get_quick_test_runner().get_job(job_id).done.wait(float(timeout))
+        return self.get_quick_test_status(job_id)
+
+    def stop_quick_test(self, job_id):
+        self._get_quick_test_runner().stop(job_id)
+
+    def _get_quick_test_runner(self):
+        if not self.quick_test_runner:
+            raise Exception('No quick test jobs')
+        return self.quick_test_runner
 
     def get_session_id(self):
         return self.ixn.api.session
 
+    def get_metrics(self):
+        return self.metrics.to_dict()
+
     def get_children(self, obj_ref, child_type):
         return self.ixn.api.getList(obj_ref, child_type)
 
@@ -134,4 +765,104 @@ class IxnHandler(TrafficHandler):
         return self.ixn.api.getAttributes(obj_ref)
 
     def set_attribute(self, obj_ref, attr_name, attr_value):
+        self._config_changed()
         return self.ixn.api.setAttributes(obj_ref, **{attr_name: attr_value})
+
+    def get_attributes_bulk(self, objects):
+        """ Get attributes of multiple objects, objects are read concurrently.
+
+        :param objects: JSON list of {"obj_ref": object reference, "attributes": [attribute names]}, empty or missing
+            attributes list for all attributes.
+        :return: list of {"obj_ref": object reference, "attributes": {name: value}} or {"obj_ref", "error"} per entry.
+        """
+
+        def _get_attributes(entry):
+            attributes = self.ixn.api.getAttributes(entry['obj_ref'])
+            if entry.get('attributes'):
+                attributes = {a: attributes.get(a) for a in entry['attributes']}
+            return attributes
+
+        results = []
+        for entry, attributes, error in run_concurrently(_get_attributes, json.loads(objects), self.max_rest_workers):
+            if error:
+                results.append({'obj_ref': entry.get('obj_ref'), 'error': str(error)})
+            else:
+                results.append({'obj_ref': entry['obj_ref'], 'attributes': attributes})
+        return results
+
+    def set_attributes_bulk(self, objects):
+        """ Set attributes of multiple objects, objects are set concurrently.
+
+        IxNetwork REST has no multi object update so each object is still a PATCH request, but all requests run in a
+        single command with bounded concurrency.
+
+        :param objects: JSON list of {"obj_ref": object reference, "attributes": {name: value}}.
+        :return: list of {"obj_ref": object reference, "status": "ok"} or {"obj_ref", "error"} per entry.
+        """
+
+        self._config_changed()
+
+        def _set_attributes(entry):
+            self.ixn.api.setAttributes(entry['obj_ref'], **entry['attributes'])
+
+        results = []
+        for entry, _, error in run_concurrently(_set_attributes, json.loads(objects), self.max_rest_workers):
+            if error:
+                self.logger.error('Failed to set attributes of {} - {}'.format(entry.get('obj_ref'), error))
+                results.append({'obj_ref': entry.get('obj_ref'), 'error': str(error)})
+            else:
+                results.append({'obj_ref': entry['obj_ref'], 'status': 'ok'})
+        return results
+
+    def get_object_tree(self, obj_ref, depth='1', child_types=''):
+        """ Get object sub tree with all objects attributes.
+
+        The tree is read level by level, all objects of the same level concurrently. The result is cached until the
+        next configuration change, traffic regenerate, quick test or protocols command.
+
+        :param obj_ref: root object reference.
+        :param depth: number of levels to read below the root object, 0 for root object only.
+        :param child_types: comma separated list of child types to descend into, empty for all child types.
+        :return: {"obj_ref": reference, "attributes": {name: value}, "children": {child type: [sub trees]}}.
+        """
+
+        child_types = _split_list(child_types)
+        tree_key = (obj_ref, int(depth), tuple(child_types))
+        if tree_key not in self.object_trees:
+            self.object_trees[tree_key] = self._read_object_tree(obj_ref, int(depth), child_types)
+        return self.object_trees[tree_key]
+
+    def _read_object_tree(self, obj_ref, depth, child_types):
+
+        def _read_object(node):
+            attributes = self.ixn.api.getAttributes(node['obj_ref'])
+            attributes.pop('links', None)
+            children = {}
+            if node['depth'] < depth:
+                types, _, _ = self.ixn.api.help(node['obj_ref'])
+                for child_type in types:
+                    if child_types and child_type not in child_types:
+                        continue
+                    try:
+                        children[child_type] = self.ixn.api.getList(node['obj_ref'], child_type)
+                    except Exception as e:
+                        self.logger.debug('Failed to read {} children of {} - {}'.
+                                          format(child_type, node['obj_ref'], e))
+            return attributes, children
+
+        root = {'obj_ref': obj_ref, 'depth': 0}
+        level = [root]
+        while level:
+            next_level = []
+            for node, attributes_children, error in run_concurrently(_read_object, level, self.max_rest_workers):
+                node_depth = node.pop('depth')
+                if error:
+                    node['error'] = str(error)
+                    continue
+                node['attributes'], children = attributes_children
+                node['children'] = {}
+                for child_type, children_refs in children.items():
+                    node['children'][child_type] = [{'obj_ref': r, 'depth': node_depth + 1} for r in children_refs]
+                    next_level.extend(node['children'][child_type])
+            level = next_level
+        return root
@@ -0,0 +1,154 @@
+import bisect
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency histogram buckets upper bounds (milliseconds), the last bucket holds all longer operations.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000, 300000)
+
+
+class OperationMetrics(object):
+    """ Call count and latency histogram of a single operation. """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, seconds * 1000)] += 1
+
+    def to_dict(self):
+        histogram = {}
+        for index, count in enumerate(self.buckets):
+            if count:
+                if index < len(BUCKETS_MS):
+                    histogram['<={}ms'.format(BUCKETS_MS[index])] = count
+                else:
+                    histogram['>{}ms'.format(BUCKETS_MS[-1])] = count
+        return {'count': self.count,
+                'total_ms': self.total * 1000,
+                'avg_ms': self.total * 1000 / self.count,
+                'min_ms': self.min * 1000,
+                'max_ms': self.max * 1000,
+                'histogram': histogram}
+
+
+class Metrics(object):
+    """ Thread safe registry of operations metrics.
+
+    Operation names are <category>.<operation>, for example command.load_config or rest.get ixnetwork/vport.
+    """
+
+    def __init__(self):
+        self.operations = {}
+        # {category: [count, total seconds]}
+        self.categories = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self.lock:
+            if name not in self.operations:
+                self.operations[name] = OperationMetrics()
+            self.operations[name].record(seconds)
+            category = self.categories.setdefault(name.split('.')[0], [0, 0.0])
+            category[0] += 1
+            category[1] += seconds
+
+    @contextmanager
+    def timed(self, name):
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.record(name, time.time() - start_time)
+
+    def get_categories(self):
+        """ Returns {category: (count, total seconds)}. """
+
+        with self.lock:
+            return {c: tuple(v) for c, v in self.categories.items()}
+
+    def to_dict(self):
+        with self.lock:
+            return {name: operation.to_dict() for name, operation in self.operations.items()}
+
+
+class MetricsProxy(object):
+    """ Transparent proxy that records the latency of every method call of the wrapped object. """
+
+    def __init__(self, wrapped, metrics, category, log_summary=False):
+        """
+        :param wrapped: object to wrap.
+        :param metrics: Metrics registry to record calls in.
+        :param category: calls are recorded as <category>.<method name>.
+        :param log_summary: True - log summary line, with other categories calls made during the call, to the wrapped
+            object logger after each call. Calls made concurrently by other threads are included in the summary.
+        """
+
+        object.__setattr__(self, 'wrapped', wrapped)
+        object.__setattr__(self, '_metrics', metrics)
+        object.__setattr__(self, '_category', category)
+        object.__setattr__(self, '_log_summary', log_summary)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.wrapped, name)
+        if not callable(attribute) or name.startswith('_'):
+            return attribute
+
+        def timed_call(*args, **kwargs):
+            before = self._metrics.get_categories() if self._log_summary else None
+            start_time = time.time()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                elapsed = time.time() - start_time
+                self._metrics.record('{}.{}'.format(self._category, name), elapsed)
+                if self._log_summary:
+                    self._log_call_summary(name, elapsed, before)
+
+        return timed_call
+
+    def __setattr__(self, name, value):
+        setattr(self.wrapped, name, value)
+
+    def _log_call_summary(self, name, elapsed, before):
+        logger = getattr(self.wrapped, 'logger', None)
+        if not logger:
+            return
+        summary = []
+        for category, (count, total) in sorted(self._metrics.get_categories().items()):
+            before_count, before_total = before.get(category, (0, 0.0))
+            if category != self._category and count > before_count:
+                summary.append('{} {} calls {:.3f}s'.format(category, count - before_count, total - before_total))
+        logger.info('{} {} took {:.3f}s ({})'.format(self._category, name, elapsed, ', '.join(summary)))
+
+
+def time_rest_requests(api, metrics):
+    """ Record latency of all REST requests of IxNetwork REST API wrapper.
+
+    Requests are recorded as rest.<method> <url path without session and object indices>. Safe to call again on the
+    same (pooled) API object with new metrics registry.
+    """
+
+    request = getattr(api, 'untimed_request', api.request)
+    api.untimed_request = request
+
+    def timed_request(command, url, *args, **kwargs):
+        with metrics.timed('rest.{} {}'.format(command.__name__, _rest_operation(url))):
+            return request(command, url, *args, **kwargs)
+
+    api.request = timed_request
+
+
+def _rest_operation(url):
+    path = url.split('?')[0]
+    path = 'ixnetwork' + path.split('/ixnetwork', 1)[1] if '/ixnetwork' in path else 'sessions'
+    return re.sub('/[0-9]+', '', path)
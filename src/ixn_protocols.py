@@ -0,0 +1,181 @@
+import time
+
+# Session object kinds.
+SESSIONS = 'sessions'
+ARP = 'arp'
+
+
+class ProtocolsWaiter(object):
+    """ Wait until protocol sessions are up or ARP/ND is resolved, polling all objects concurrently.
+
+    NGPF protocol stacks (any object under topology with stateCounts/sessionStatus), NGPF IPv4/IPv6 stacks ARP/ND
+    (resolvedGatewayMac), enabled classic protocols (vport/protocols/<protocol> runningState) and classic interfaces
+    IPv4/IPv6 gateways (vport/interface/<ipv4|ipv6> gateway resolved in vport/discoveredNeighbor) are found once and
+    then polled until all are ready. Each round polls only objects that are not ready yet.
+    """
+
+    # Polling interval bounds (seconds), the interval doubles while nothing changes and resets on progress.
+    min_interval = 0.1
+    max_interval = 2.0
+    # Maximum depth of NGPF objects below topology.
+    max_depth = 8
+    # Classic interface gateway and discovered neighbor MAC values that mean no gateway/not resolved.
+    no_gateways = ('', '0.0.0.0', '::', '0:0:0:0:0:0:0:0')
+    unresolved_macs = ('', '00:00:00:00:00:00')
+
+    def __init__(self, api, logger, run_concurrently, max_workers):
+        """
+        :param api: IxNetwork REST API wrapper.
+        :param run_concurrently: function(func, items, max_workers) -> [(item, result, exception)].
+        :param max_workers: maximum number of concurrent REST requests.
+        """
+
+        self.api = api
+        self.logger = logger
+        self.run_concurrently = run_concurrently
+        self.max_workers = max_workers
+
+    def find_objects(self, root_ref, vports_refs):
+        """ Find all session and ARP/ND objects.
+
+        :return: {SESSIONS: [obj_ref], ARP: [obj_ref]}.
+        """
+
+        objects = {SESSIONS: [], ARP: []}
+        level = [(r, 1) for r in self._get_list(root_ref, 'topology')]
+        while level:
+            next_level = []
+            for (obj_ref, depth), children, error in self.run_concurrently(self._read_ngpf_object, level,
+                                                                            self.max_workers):
+                if error:
+                    self.logger.debug('Failed to read {} - {}'.format(obj_ref, error))
+                    continue
+                attributes, children_refs = children
+                if 'stateCounts' in attributes or 'sessionStatus' in attributes:
+                    objects[SESSIONS].append(obj_ref)
+                if 'resolvedGatewayMac' in attributes:
+                    objects[ARP].append(obj_ref)
+                if depth < self.max_depth:
+                    next_level.extend((r, depth + 1) for r in children_refs)
+            level = next_level
+
+        for vport_ref, protocols_refs, error in self.run_concurrently(self._read_classic_protocols, vports_refs,
+                                                                       self.max_workers):
+            if error:
+                self.logger.debug('Failed to read {} protocols - {}'.format(vport_ref, error))
+            else:
+                objects[SESSIONS].extend(protocols_refs)
+        for vport_ref, ips_refs, error in self.run_concurrently(self._read_classic_interfaces, vports_refs,
+                                                                 self.max_workers):
+            if error:
+                self.logger.debug('Failed to read {} interfaces - {}'.format(vport_ref, error))
+            else:
+                objects[ARP].extend(ips_refs)
+        return objects
+
+    def wait(self, objects_refs, kind, timeout):
+        """ Poll objects until all are ready.
+
+        :param objects_refs: list of objects references to poll.
+        :param kind: SESSIONS - wait for sessions up, ARP - wait for ARP/ND resolved.
+        :param timeout: max time (seconds) to wait.
+        :return: time (seconds) until all objects were ready.
+        """
+
+        start_time = time.time()
+        deadline = start_time + timeout
+        interval = self.min_interval
+        pending = {r: None for r in objects_refs}
+        pending_count = len(pending)
+        while True:
+            for obj_ref, status, error in self.run_concurrently(lambda r: self._get_status(r, kind), list(pending),
+                                                                 self.max_workers):
+                if error:
+                    pending[obj_ref] = str(error)
+                elif status is None:
+                    pending.pop(obj_ref)
+                else:
+                    pending[obj_ref] = status
+            if not pending:
+                return time.time() - start_time
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise Exception('{} of {} objects not {} after {} seconds: {}'.
+                                format(len(pending), len(objects_refs), 'up' if kind == SESSIONS else 'resolved',
+                                       timeout, '; '.join('{} - {}'.format(r, s) for r, s in sorted(pending.items()))))
+            interval = self.min_interval if len(pending) < pending_count else min(interval * 2, self.max_interval)
+            pending_count = len(pending)
+            time.sleep(min(interval, remaining))
+
+    def _get_list(self, obj_ref, child_type):
+        try:
+            return self.api.getList(obj_ref, child_type)
+        except Exception as e:
+            self.logger.debug('Failed to read {} children of {} - {}'.format(child_type, obj_ref, e))
+            return []
+
+    def _read_ngpf_object(self, obj_ref_depth):
+        obj_ref = obj_ref_depth[0]
+        attributes = self.api.getAttributes(obj_ref)
+        children_refs = []
+        child_types, _, _ = self.api.help(obj_ref)
+        for child_type in child_types:
+            children_refs.extend(self._get_list(obj_ref, child_type))
+        return attributes, children_refs
+
+    def _read_classic_protocols(self, vport_ref):
+        """ Returns references of the enabled classic protocols of the port. """
+
+        protocols_ref = vport_ref + '/protocols'
+        protocols_types, _, _ = self.api.help(protocols_ref)
+        enabled_protocols = []
+        for protocol_type in protocols_types:
+            attributes = self.api.getAttributes(protocols_ref + '/' + protocol_type)
+            if 'runningState' in attributes and str(attributes.get('enabled')).lower() == 'true':
+                enabled_protocols.append(protocols_ref + '/' + protocol_type)
+        return enabled_protocols
+
+    def _read_classic_interfaces(self, vport_ref):
+        """ Returns references of the IPv4/IPv6 objects with gateway of the enabled classic interfaces of the port. """
+
+        ips_refs = []
+        for interface_ref in self._get_list(vport_ref, 'interface'):
+            if str(self.api.getAttributes(interface_ref).get('enabled')).lower() != 'true':
+                continue
+            for ip_ref in self._get_list(interface_ref, 'ipv4') + self._get_list(interface_ref, 'ipv6'):
+                if self.api.getAttributes(ip_ref).get('gateway', '') not in self.no_gateways:
+                    ips_refs.append(ip_ref)
+        return ips_refs
+
+    def _get_status(self, obj_ref, kind):
+        """ Returns None if the object is ready, else description of the object status. """
+
+        attributes = self.api.getAttributes(obj_ref)
+        name = attributes['name'] + ' ' if attributes.get('name') else ''
+        if kind == ARP and 'resolvedGatewayMac' not in attributes:
+            return self._get_classic_arp_status(obj_ref, attributes['gateway'])
+        if kind == ARP:
+            unresolved = [m for m in attributes.get('resolvedGatewayMac', []) if 'unresolved' in str(m).lower()]
+            return '{}{} unresolved'.format(name, len(unresolved)) if unresolved else None
+        if 'runningState' in attributes:
+            state = attributes['runningState']
+            return None if state == 'started' else '{}{}'.format(name, state)
+        counts = attributes.get('stateCounts')
+        if isinstance(counts, dict):
+            not_up = int(counts.get('down', 0)) + int(counts.get('notStarted', 0))
+            total = int(counts.get('total', 0))
+        else:
+            statuses = attributes.get('sessionStatus', [])
+            not_up = len([s for s in statuses if s != 'up'])
+            total = len(statuses)
+        return '{}{}/{} up'.format(name, total - not_up, total) if not_up else None
+
+    def _get_classic_arp_status(self, ip_ref, gateway):
+        """ Returns None if the gateway of the classic interface is in the port discovered neighbors, with MAC. """
+
+        vport_ref = ip_ref.split('/interface')[0]
+        for neighbor_ref in self._get_list(vport_ref, 'discoveredNeighbor'):
+            neighbor = self.api.getAttributes(neighbor_ref)
+            if neighbor.get('neighborIp') == gateway and neighbor.get('neighborMac', '') not in self.unresolved_macs:
+                return None
+        return 'gateway {} unresolved'.format(gateway)
@@ -0,0 +1,132 @@
+import itertools
+import threading
+import time
+import Queue
+
+# Quick test results attributes reported as job progress.
+PROGRESS_ATTRIBUTES = ('isRunning', 'status', 'progress', 'currentActions', 'result', 'resultPath')
+
+
+class QuickTestJob(object):
+    """ Single quick test run. """
+
+    def __init__(self, job_id, test):
+        self.job_id = job_id
+        self.test = test
+        self.state = 'queued'
+        self.result = None
+        self.result_path = None
+        self.error = None
+        self.start_time = None
+        self.end_time = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        return {'job_id': self.job_id,
+                'test': self.test,
+                'state': self.state,
+                'result': self.result,
+                'result_path': self.result_path,
+                'error': self.error,
+                'start_time': self.start_time,
+                'end_time': self.end_time}
+
+
+class QuickTestRunner(threading.Thread):
+    """ Background thread that runs queued quick test jobs one after the other until shutdown. """
+
+    def __init__(self, ixn, logger, timeout):
+        """
+        :param ixn: IxnApp object.
+        :param timeout: max time (seconds) to wait for each quick test to finish.
+        """
+
+        super(QuickTestRunner, self).__init__(name='QuickTestRunner')
+        self.daemon = True
+        self.ixn = ixn
+        self.logger = logger
+        self.timeout = timeout
+        self.jobs = {}
+        self.queue = Queue.Queue()
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def submit(self, test):
+        """ Queue quick test.
+
+        :return: job.
+        """
+
+        with self.lock:
+            job = QuickTestJob(str(next(self.ids)), test)
+            self.jobs[job.job_id] = job
+        self.queue.put(job)
+        return job
+
+    def get_job(self, job_id):
+        if job_id not in self.jobs:
+            raise Exception('Quick test job "{}" not found'.format(job_id))
+        return self.jobs[job_id]
+
+    def get_status(self, job_id):
+        """ Returns job status, for running job add the quick test results progress attributes. """
+
+        job = self.get_job(job_id)
+        status = job.to_dict()
+        if job.state in ('running', 'stopping'):
+            results = self.ixn.root.get_quick_tests()[job.test].get_child_static('results')
+            attributes = self.ixn.api.getAttributes(results.ref)
+            status['progress'] = {a: attributes[a] for a in PROGRESS_ATTRIBUTES if a in attributes}
+        return status
+
+    def stop(self, job_id):
+        """ Stop running job or cancel queued job. """
+
+        job = self.get_job(job_id)
+        if job.state == 'queued':
+            job.state = 'cancelled'
+            job.done.set()
+        elif job.state == 'running':
+            job.state = 'stopping'
+            self.ixn.quick_test_stop(job.test)
+
+    def stop_all(self):
+        for job_id in list(self.jobs):
+            self.stop(job_id)
+
+    def shutdown(self, timeout):
+        """ Stop all jobs and end the runner thread.
+
+        :param timeout: max time (seconds) to wait for the running job to stop and the thread to end.
+        """
+
+        try:
+            self.stop_all()
+        finally:
+            self.queue.put(None)
+            self.join(timeout)
+
+    def run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            if job.state == 'cancelled':
+                continue
+            job.state = 'running'
+            job.start_time = time.time()
+            self.logger.info('Quick test {} job {} started'.format(job.test, job.job_id))
+            try:
+                self.ixn.quick_test_apply(job.test)
+                job.result = self.ixn.quick_test_start(job.test, blocking=True, timeout=self.timeout)
+                results = self.ixn.root.get_quick_tests()[job.test].get_child_static('results')
+                job.result_path = results.get_attribute('resultPath')
+                job.state = 'stopped' if job.state == 'stopping' else 'finished'
+            except Exception as e:
+                self.logger.error('Quick test {} job {} failed - {}'.format(job.test, job.job_id, e))
+                job.error = str(e)
+                job.state = 'failed'
+            job.end_time = time.time()
+            self.logger.info('Quick test {} job {} {} after {:.2f} seconds'.
+                             format(job.test, job.job_id, job.state, job.end_time - job.start_time))
+            job.done.set()
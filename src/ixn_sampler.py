@@ -0,0 +1,118 @@
+import threading
+import time
+from array import array
+
+from ixn_statistics import to_number
+
+
+class StatsRingBuffer(object):
+    """ Fixed size time series of one statistics view.
+
+    Only numeric statistics are stored, one typed array per <object name, caption> series. Once the buffer is full
+    each new sample overwrites the oldest one.
+    """
+
+    def __init__(self, max_samples, max_bytes):
+        """
+        :param max_samples: requested number of samples to keep.
+        :param max_bytes: memory cap, the number of samples is reduced so all series fit into max_bytes.
+        """
+
+        self.max_samples = max_samples
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.count = 0
+        self.next_index = 0
+        self.timestamps = None
+        # {(object name, caption): array of values}
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def add(self, timestamp, stats):
+        """ Add sample.
+
+        :param timestamp: sample time (seconds since epoch).
+        :param stats: iterable of (object name, {caption: value}).
+        """
+
+        values = {}
+        for name, row in stats:
+            for caption, value in row.items():
+                number = to_number(value)
+                if number is not None:
+                    values[(name, caption)] = number
+
+        with self.lock:
+            if self.timestamps is None:
+                item_size = array('d').itemsize
+                self.size = max(min(self.max_samples, self.max_bytes // (item_size * (len(values) + 1))), 2)
+                self.timestamps = array('d', [0.0]) * self.size
+            for key, number in values.items():
+                if key not in self.series:
+                    if (len(self.series) + 2) * self.size * self.timestamps.itemsize > self.max_bytes:
+                        continue
+                    self.series[key] = array('d', [float('nan')]) * self.size
+                self.series[key][self.next_index] = number
+            for key in set(self.series) - set(values):
+                self.series[key][self.next_index] = float('nan')
+            self.timestamps[self.next_index] = timestamp
+            self.next_index = (self.next_index + 1) % self.size
+            self.count = min(self.count + 1, self.size)
+
+    def get_series(self):
+        """ Returns all series in chronological order with per interval deltas and rates.
+
+        Deltas and rates are calculated in one pass over each column.
+
+        :return: (timestamps, {(object name, caption): (values, deltas, rates)}), missing values, and deltas and
+            rates of the first sample, are None.
+        """
+
+        with self.lock:
+            start = (self.next_index - self.count) % self.size if self.size else 0
+            order = [(start + i) % self.size for i in range(self.count)]
+            timestamps = [self.timestamps[i] for i in order]
+            intervals = [t2 - t1 for t1, t2 in zip(timestamps, timestamps[1:])]
+            series = {}
+            for key, column in self.series.items():
+                # NaN marks samples where the object was missing from the view.
+                values = [column[i] if column[i] == column[i] else None for i in order]
+                deltas = [v2 - v1 if v1 is not None and v2 is not None else None for v1, v2 in zip(values, values[1:])]
+                rates = [d / i if d is not None and i else None for d, i in zip(deltas, intervals)]
+                series[key] = (values, [None] + deltas, [None] + rates)
+        return timestamps, series
+
+
+class StatsSampler(threading.Thread):
+    """ Background thread that polls statistics views on interval into ring buffers. """
+
+    def __init__(self, read_view, view_names, interval, buffers, logger):
+        """
+        :param read_view: function that gets view name and returns iterable of (object name, {caption: value}).
+        :param view_names: list of views to sample.
+        :param interval: sampling interval in seconds.
+        :param buffers: dictionary {view name: StatsRingBuffer}.
+        """
+
+        super(StatsSampler, self).__init__(name='StatsSampler')
+        self.daemon = True
+        self.read_view = read_view
+        self.view_names = view_names
+        self.interval = interval
+        self.buffers = buffers
+        self.logger = logger
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            start_time = time.time()
+            for view_name in self.view_names:
+                try:
+                    self.buffers[view_name].add(time.time(), self.read_view(view_name))
+                except Exception as e:
+                    self.logger.warning('Failed to sample statistics view {} - {}'.format(view_name, e))
+            self.stop_event.wait(max(self.interval - (time.time() - start_time), 0))
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
@@ -0,0 +1,157 @@
+import atexit
+import threading
+import time
+
+
+class IxnSessionPool(object):
+    """ Process wide pool of connected IxNetwork sessions keyed by (api server, api port, user).
+
+    pyixnetwork keeps process wide state (IxnObject.root, chassis objects under root hw) so only one session can be in
+    use at a time, acquire waits until the session in use is released.
+
+    Sessions returned to the pool stay connected and are reused, with their configuration cleared, by the next
+    acquire of the same key. Idle sessions are disconnected after idle_timeout seconds by a background timer, and all
+    idle sessions are disconnected when the process exits.
+    """
+
+    # Max time (seconds) acquire waits for the session in use to be released.
+    acquire_timeout = 60
+    # Time (seconds) an idle session is kept before it is disconnected.
+    idle_timeout = 600
+
+    def __init__(self):
+        # {key: [(ixn, release time)]}
+        self.idle = {}
+        # {key: number of sessions in use}
+        self.in_use = {}
+        self.lock = threading.Lock()
+        # Notified when the session in use is released or discarded.
+        self.released = threading.Condition(self.lock)
+        # Pending idle eviction timers, one per release.
+        self.evict_timers = []
+        atexit.register(self._shutdown)
+
+    def acquire(self, key, connect, logger):
+        """ Get connected session, reuse idle session if there is a healthy one else create new session.
+
+        :param key: (api server, api port, user).
+        :param connect: function that creates and returns new connected IxnApp.
+        :return: connected IxnApp with empty configuration.
+        """
+
+        self.evict_idle()
+        while True:
+            with self.lock:
+                self._wait_released()
+                if not self.idle.get(key):
+                    self.in_use[key] = self.in_use.get(key, 0) + 1
+                    break
+                ixn, _ = self.idle[key].pop()
+                self.in_use[key] = self.in_use.get(key, 0) + 1
+            try:
+                from ixnetwork.ixn_object import IxnObject
+                ixn.logger = ixn.api.logger = ixn.root.logger = logger
+                IxnObject.root = ixn.root
+                ixn.new_config()
+                logger.info('Reusing IxNetwork session {} to {}'.format(ixn.api.session, key))
+                return ixn
+            except Exception as e:
+                logger.warning('Dropping unhealthy IxNetwork session to {} - {}'.format(key, e))
+                self._discard(key)
+
+        try:
+            return connect()
+        except Exception:
+            self._discard(key)
+            raise
+
+    def release(self, key, ixn):
+        """ Return session to pool and start timer that disconnects it if it is still idle after idle_timeout. """
+
+        self.evict_idle()
+        with self.lock:
+            self.in_use[key] -= 1
+            self.released.notify_all()
+            self.idle.setdefault(key, []).append((ixn, time.time()))
+            evict_timer = threading.Timer(self.idle_timeout + 1, self.evict_idle)
+            evict_timer.daemon = True
+            evict_timer.start()
+            self.evict_timers = [t for t in self.evict_timers if t.is_alive()] + [evict_timer]
+
+    def discard(self, key, ixn):
+        """ Drop in use session that can not be returned to the pool and disconnect it. """
+
+        self._discard(key)
+        self._disconnect(key, ixn)
+
+    def evict_idle(self):
+        """ Disconnect sessions that were idle for more than idle_timeout seconds. """
+
+        now = time.time()
+        expired = []
+        with self.lock:
+            for key, sessions in self.idle.items():
+                expired += [(key, ixn) for ixn, release_time in sessions if now - release_time > self.idle_timeout]
+                sessions[:] = [s for s in sessions if now - s[1] <= self.idle_timeout]
+        for key, ixn in expired:
+            self._disconnect(key, ixn)
+
+    def disconnect_idle(self):
+        """ Disconnect all idle sessions. """
+
+        with self.lock:
+            idle = [(key, ixn) for key, sessions in self.idle.items() for ixn, _ in sessions]
+            self.idle = {}
+        for key, ixn in idle:
+            self._disconnect(key, ixn)
+
+    def check_idle(self):
+        """ Health check idle sessions and disconnect unhealthy sessions. """
+
+        self.evict_idle()
+        with self.lock:
+            idle = [(key, session) for key, sessions in self.idle.items() for session in sessions]
+        for key, session in idle:
+            try:
+                session[0].api.getVersion()
+            except Exception as e:
+                session[0].logger.warning('Dropping unhealthy idle IxNetwork session to {} - {}'.format(key, e))
+                with self.lock:
+                    if session in self.idle.get(key, []):
+                        self.idle[key].remove(session)
+
+    def _shutdown(self):
+        """ Stop eviction timers and disconnect all idle sessions, called at process exit. """
+
+        with self.lock:
+            evict_timers, self.evict_timers = self.evict_timers, []
+        for evict_timer in evict_timers:
+            evict_timer.cancel()
+            evict_timer.join()
+        self.disconnect_idle()
+
+    def _wait_released(self):
+        """ Wait until no session is in use, must be called under lock. """
+
+        deadline = time.time() + self.acquire_timeout
+        while any(self.in_use.values()):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                in_use = [k for k, count in self.in_use.items() if count]
+                raise Exception('IxNetwork session to {} still in use after {} seconds, only one session can be in '
+                                'use per process'.format(in_use[0], self.acquire_timeout))
+            self.released.wait(remaining)
+
+    def _discard(self, key):
+        with self.lock:
+            self.in_use[key] -= 1
+            self.released.notify_all()
+
+    def _disconnect(self, key, ixn):
+        try:
+            ixn.disconnect()
+        except Exception as e:
+            ixn.logger.warning('Failed to disconnect IxNetwork session to {} - {}'.format(key, e))
+
+
+session_pool = IxnSessionPool()
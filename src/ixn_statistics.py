@@ -0,0 +1,316 @@
+import csv
+import itertools
+import json
+import operator
+import re
+import struct
+import threading
+import zipfile
+from collections import OrderedDict
+
+from trafficgenerator.tgn_utils import is_false
+
+from ixnetwork.api.ixn_rest import IxnRestWrapper
+from ixnetwork.ixn_statistics_view import IxnStatisticsView, view_2_caption
+
+# Page selection is server side state of the view so page set/read pairs of the same view must not interleave.
+_page_locks = {}
+_page_locks_lock = threading.Lock()
+
+# Threshold operators, two characters operators first so '<=' is not parsed as '<'.
+_operators = OrderedDict([('<=', operator.le), ('>=', operator.ge), ('==', operator.eq), ('!=', operator.ne),
+                          ('<', operator.lt), ('>', operator.gt)])
+_threshold_re = re.compile(r'^(?:(?P<view>[^:]+):)?\s*(?P<caption>.+?)\s*(?P<operator>{})\s*(?P<value>[^\s]+)$'.
+                           format('|'.join(re.escape(o) for o in _operators)))
+
+
+def _page_lock(view_ref):
+    with _page_locks_lock:
+        return _page_locks.setdefault(view_ref, threading.Lock())
+
+
+class IxnStatisticsStream(IxnStatisticsView):
+    """ Statistics view that reads the view page by page and yields rows instead of storing the whole view. """
+
+    # Rows per page, IxNetwork maximum.
+    page_size = 500
+
+    def __init__(self, root, name, ixn_view=None):
+        """
+        :param ixn_view: view object returned by find_views, None - find the view by name.
+        """
+
+        if ixn_view is None:
+            super(IxnStatisticsStream, self).__init__(root, name)
+        else:
+            self.root = root
+            self.name_caption = view_2_caption.get(name, 'Port Name')
+            self.ixn_view = ixn_view
+        if not hasattr(self, 'ixn_view'):
+            raise Exception('Statistics view "{}" not found'.format(name))
+        self.name = name
+        self.captions = []
+
+    def iter_stats(self, columns=None, rows=None):
+        """ Read view captions and return generator over the view rows.
+
+        Flow statistics name spans all columns up to 'Tx Frames', other views names are the view name caption.
+        Rows and columns are filtered while reading the pages, before any row dictionary is built.
+
+        :param columns: list of requested captions, empty list for all captions.
+        :param rows: list of requested object names or name regular expressions, empty list for all rows.
+        :return: generator of (object name, {caption: value}) for requested rows in the view.
+        """
+
+        page = self.ixn_view.get_child_static('page')
+        if is_false(page.get_attribute('isReady')):
+            raise Exception('Statistics view "{}" not ready'.format(self.name))
+        captions = page.get_list_attribute('columnCaptions')
+        if self.name_caption:
+            name_indices = [captions.index(self.name_caption)]
+        else:
+            name_indices = list(range(captions.index('Tx Frames')))
+        if columns:
+            unknown_columns = set(columns) - set(captions)
+            if unknown_columns:
+                raise Exception('Columns {} not found in statistics view "{}"'.format(list(unknown_columns), self.name))
+            value_indices = [captions.index(c) for c in columns]
+        else:
+            value_indices = [i for i in range(len(captions)) if i not in name_indices]
+        self.captions = [captions[i] for i in value_indices]
+        page.set_attributes(pageSize=self.page_size)
+        total_pages = int(page.get_attribute('totalPages'))
+        return self._iter_pages(page, total_pages, name_indices, value_indices, _rows_matcher(rows))
+
+    def _iter_pages(self, page, total_pages, name_indices, value_indices, is_requested_row):
+        page_lock = _page_lock(self.ixn_view.ref)
+        for page_num in range(1, total_pages + 1):
+            with page_lock:
+                page.set_attributes(commit=True, currentPage=page_num)
+                page_values = page.get_list_attribute('pageValues')
+            for row in page_values:
+                name = '/'.join(row[i] for i in name_indices)
+                if is_requested_row(name):
+                    yield name, dict(zip(self.captions, [row[i] for i in value_indices]))
+
+
+def find_views(root, names):
+    """ Find statistics views objects, all views are listed once instead of once per requested view.
+
+    :param names: list of view names.
+    :return: {view name: view object} of the views found.
+    """
+
+    statistics = root.get_child_static('statistics')
+    if type(root.api) is not IxnRestWrapper:
+        return {name: statistics.get_child_static('view:"{}"'.format(name)) for name in names}
+    views = {}
+    for view in statistics.get_children('view'):
+        caption = view.get_attribute('caption')
+        if caption in names and caption not in views:
+            views[caption] = view
+    return views
+
+
+def _rows_matcher(rows):
+    """ Returns function that tells whether object name matches one of the requested names or regular expressions. """
+
+    if not rows:
+        return lambda name: True
+    names = set(rows)
+    patterns = []
+    for row in rows:
+        try:
+            patterns.append(re.compile(row + '$'))
+        except re.error:
+            pass
+    return lambda name: name in names or any(p.match(name) for p in patterns)
+
+
+def to_number(value):
+    """ Returns statistics value as float or None if the value is not numeric. """
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def delta_caption(caption):
+    """ Returns caption of the delta of statistic, suffix does not clash with IxNetwork captions. """
+
+    return caption + ' (delta)'
+
+
+def rate_caption(caption):
+    """ Returns caption of the per second rate of statistic, IxNetwork has its own '... Rate' captions. """
+
+    return caption + ' (rate/s)'
+
+
+def delta_stats(stats, captions, previous, read_time, snapshot):
+    """ Filter statistics rows to rows with changed counters and add per row deltas and rates of numeric statistics.
+
+    Numeric statistics are the statistics whose value in the first row is a number or empty. Rows not found in the
+    previous snapshot are always returned, with empty deltas and rates.
+
+    :param stats: iterable of (object name, {caption: value}) of the current read.
+    :param captions: captions of the current read.
+    :param previous: (read time, {object name: {caption: number}}) of the previous read, None if no previous read.
+    :param read_time: time of the current read.
+    :param snapshot: dictionary to fill with {object name: {caption: number}} of the current read.
+    :return: (captions - all captions followed by numeric captions deltas and rates, generator of
+        (object name, {caption: value, caption (delta): delta, caption (rate/s): rate})).
+    """
+
+    stats = iter(stats)
+    first_row = next(stats, None)
+    if first_row is None:
+        return captions, iter([])
+    numeric_captions = [c for c in captions if first_row[1].get(c, '') == '' or to_number(first_row[1][c]) is not None]
+    delta_captions = (captions + [delta_caption(c) for c in numeric_captions] +
+                      [rate_caption(c) for c in numeric_captions])
+    rows = _iter_delta_stats(itertools.chain([first_row], stats), numeric_captions, previous, read_time, snapshot)
+    return delta_captions, rows
+
+
+def _iter_delta_stats(stats, numeric_captions, previous, read_time, snapshot):
+    previous_time, previous_stats = previous if previous else (None, {})
+    elapsed = read_time - previous_time if previous_time else None
+    for name, row in stats:
+        numbers = {}
+        for caption in numeric_captions:
+            number = to_number(row.get(caption))
+            if number is not None:
+                numbers[caption] = number
+        snapshot[name] = numbers
+        deltas = {}
+        if name in previous_stats:
+            previous_numbers = previous_stats[name]
+            deltas = {c: n - previous_numbers[c] for c, n in numbers.items() if c in previous_numbers}
+            if not any(deltas.values()):
+                continue
+        delta_row = dict(row)
+        for caption in numeric_captions:
+            delta = deltas.get(caption)
+            delta_row[delta_caption(caption)] = delta if delta is not None else ''
+            delta_row[rate_caption(caption)] = delta / elapsed if delta is not None and elapsed else ''
+        yield name, delta_row
+
+
+def write_stats_csv(output, captions, stats):
+    """ Write statistics rows to CSV file object, one row at a time.
+
+    :param output: file object to write to.
+    :param captions: CSV columns.
+    :param stats: iterable of (object name, {caption: value}).
+    :return: number of rows written.
+    """
+
+    w = csv.DictWriter(output, captions)
+    w.writeheader()
+    rows_count = 0
+    for _, row in stats:
+        w.writerow(row)
+        rows_count += 1
+    return rows_count
+
+
+def write_stats_columnar(output, view_name, captions, stats):
+    """ Write statistics rows to columnar zip file object.
+
+    The zip holds schema.json - {"view": view name, "rows": rows count, "columns": [{"name", "type", "file"}]}, and one
+    file per column, the object names column first. int64/float64 columns are little endian arrays (empty values of
+    float64 columns are NaN), string columns are UTF-8 lines.
+
+    :param output: file object to write to.
+    :param captions: statistics columns.
+    :param stats: iterable of (object name, {caption: value}).
+    :return: number of rows written.
+    """
+
+    names = []
+    columns = [[] for _ in captions]
+    for name, row in stats:
+        names.append(name)
+        for column, caption in zip(columns, captions):
+            column.append(row.get(caption, ''))
+
+    schema = {'view': view_name, 'rows': len(names), 'columns': []}
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as stats_zip:
+        for index, (caption, values) in enumerate(zip(['Object'] + captions, [names] + columns)):
+            column_type, data = _encode_column(values)
+            file_name = '{}.{}'.format(index, 'txt' if column_type == 'string' else 'bin')
+            stats_zip.writestr(file_name, data)
+            schema['columns'].append({'name': caption, 'type': column_type, 'file': file_name})
+        stats_zip.writestr('schema.json', json.dumps(schema))
+    return len(names)
+
+
+def _encode_column(values):
+    """ Returns (column type, column data) of the narrowest type that holds all values. """
+
+    integers = [_to_integer(v) for v in values]
+    if values and None not in integers:
+        return 'int64', struct.pack('<{}q'.format(len(integers)), *integers)
+    numbers = [to_number(v) for v in values]
+    if values and all(n is not None or v == '' for v, n in zip(values, numbers)):
+        numbers = [float('nan') if n is None else n for n in numbers]
+        return 'float64', struct.pack('<{}d'.format(len(numbers)), *numbers)
+    return 'string', '\n'.join(v if isinstance(v, unicode) else str(v).decode('utf-8') for v in values).encode('utf-8')
+
+
+def _to_integer(value):
+    """ Returns statistics value as int64 or None if the value is not an integer. """
+
+    if isinstance(value, float):
+        return None
+    try:
+        integer = int(value)
+    except (TypeError, ValueError):
+        return None
+    return integer if -2 ** 63 <= integer < 2 ** 63 else None
+
+
+def parse_thresholds(thresholds):
+    """ Parse pass/fail thresholds.
+
+    :param thresholds: list of [view name:]statistic operator value, for example
+        'Traffic Item Statistics: Loss % <= 0.1' or 'Frames Rx. > 0'. Thresholds without view name apply to all views
+        with the statistic.
+    :return: list of (view name or None, statistic, operator, value).
+    """
+
+    parsed = []
+    for threshold in thresholds:
+        match = _threshold_re.match(threshold.strip())
+        if not match or to_number(match.group('value')) is None:
+            raise Exception('Threshold should be [view name:]statistic operator number - got "{}"'.format(threshold))
+        view_name = match.group('view').strip() if match.group('view') else None
+        parsed.append((view_name, match.group('caption'), match.group('operator'), float(match.group('value'))))
+    return parsed
+
+
+def check_thresholds(thresholds, statistics):
+    """ Check thresholds against every row of the views they apply to.
+
+    :param thresholds: parsed thresholds as returned by parse_thresholds.
+    :param statistics: {view name: {object name: {caption: value}}}.
+    :return: list of failures descriptions, empty list if all thresholds passed.
+    """
+
+    failures = []
+    for view_name, caption, operator_name, value in thresholds:
+        expected = '{} {:g}'.format(operator_name, value)
+        views = [view_name] if view_name else sorted(statistics)
+        views_rows = [(v, statistics.get(v, {})) for v in views]
+        views_rows = [(v, rows) for v, rows in views_rows if any(caption in row for row in rows.values())]
+        if not views_rows:
+            failures.append('{}: {} not found, expected {}'.format(view_name or 'all views', caption, expected))
+        for view, rows in views_rows:
+            for name, row in sorted(rows.items()):
+                number = to_number(row.get(caption))
+                if number is None or not _operators[operator_name](number, value):
+                    failures.append('{}/{}: {} = {}, expected {}'.format(view, name, caption, row.get(caption, ''),
+                                                                           expected))
+    return failures
@@ -0,0 +1,154 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Offline benchmarks of the driver commands against the local IxNetwork REST and CloudShell API stand-ins.
+
+Run from the repository root:
+    python -m tests.benchmark_ixnetwork_controller [--latency 0.002] [--repeat 3] [--output bench_output.txt]
+
+Each run appends one JSON line per measurement to the output file, tagged with the git commit, and prints the results
+next to the latest results of another commit.
+
+Note that IxNetwork traffic start (pyixnetwork) polls traffic state every second, so start_traffic includes at least
+one second of fixed wait.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+from tests.mock_ixnetwork import MockIxNetworkServer, MockCloudShell, create_mock_context
+from src.driver import IxNetworkControllerDriver
+
+# (vports, traffic items, flows) configurations to benchmark.
+SCALES = [(2, 1, 100),
+          (8, 4, 1000),
+          (32, 8, 10000)]
+
+
+def _git_commit():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD']).strip()
+        dirty = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no']).strip()
+        return commit + '-dirty' if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _measure(server, cloudshell, operation, repeat):
+    """ Run operation repeat times.
+
+    :return: (min time, median time, REST requests per run, CloudShell API calls per run).
+    """
+
+    times = []
+    requests_count, calls_count = server.requests_count, cloudshell.calls_count
+    for _ in range(repeat):
+        start_time = time.time()
+        operation()
+        times.append(time.time() - start_time)
+    times.sort()
+    return (times[0], times[len(times) // 2], (server.requests_count - requests_count) // repeat,
+            (cloudshell.calls_count - calls_count) // repeat)
+
+
+def benchmark_scale(server, vports, traffic_items, flows, repeat, cloudshell_latency):
+    """ Benchmark driver commands on one configuration scale.
+
+    :return: list of (operation, (min time, median time, REST requests, CloudShell API calls)).
+    """
+
+    cloudshell = MockCloudShell(vports, cloudshell_latency)
+    cloudshell.install()
+    config_file, config_file_name = tempfile.mkstemp(suffix='.ixncfg')
+    os.write(config_file, json.dumps({'vports': vports, 'traffic_items': traffic_items, 'flows': flows}))
+    os.close(config_file)
+    context = create_mock_context(server)
+    driver = IxNetworkControllerDriver()
+    results = []
+    try:
+        driver.initialize(context)
+
+        def _load_config():
+            # Force full reload, the second load of the same configuration is a cache hit.
+            driver.handler.loaded_config = None
+            driver.load_config(context, config_file_name)
+
+        results.append(('load_config', _measure(server, cloudshell, _load_config, repeat)))
+        results.append(('load_config (cache hit)', _measure(
+            server, cloudshell, lambda: driver.load_config(context, config_file_name), repeat)))
+        results.append(('start_traffic', _measure(
+            server, cloudshell, lambda: driver.start_traffic(context, 'True', 'True'), repeat)))
+        results.append(('run_traffic', _measure(
+            server, cloudshell, lambda: driver.run_traffic(context, '0', 'Port Statistics, Flow Statistics',
+                                                           'Loss % <= 0'), repeat)))
+        for view_name in ('Port Statistics', 'Flow Statistics'):
+            for output_type, attachment_format in (('JSON', 'CSV'), ('CSV', 'CSV'),
+                                                   ('CSV', 'GZIP'), ('CSV', 'Columnar')):
+                operation = 'get_statistics {} {}'.format(view_name, output_type)
+                if attachment_format != 'CSV':
+                    operation += ' ' + attachment_format
+                results.append((operation, _measure(server, cloudshell, lambda: driver.get_statistics(
+                    context, view_name, output_type, attachment_format=attachment_format), repeat)))
+    finally:
+        driver.cleanup()
+        cloudshell.uninstall()
+        os.remove(config_file_name)
+    return results
+
+
+def load_previous(output, commit, latency):
+    """ Returns {(scale, operation): record} of the latest run of another commit with the same latency. """
+
+    previous = {}
+    if not os.path.exists(output):
+        return previous
+    with open(output) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    other_commits = [r['commit'] for r in records if r['commit'] != commit and r['latency'] == latency]
+    if other_commits:
+        for record in records:
+            if record['commit'] == other_commits[-1] and record['latency'] == latency:
+                previous[(record['scale'], record['operation'])] = record
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description='IxNetwork controller driver offline benchmarks')
+    parser.add_argument('--latency', type=float, default=0.002, help='IxNetwork REST request latency (seconds)')
+    parser.add_argument('--cloudshell-latency', type=float, default=0.01, help='CloudShell API call latency (seconds)')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs of each operation')
+    parser.add_argument('--output', default='bench_output.txt', help='results file (JSON lines)')
+    args = parser.parse_args()
+
+    commit = _git_commit()
+    previous = load_previous(args.output, commit, args.latency)
+    server = MockIxNetworkServer(latency=args.latency, traffic_duration=0.2).start()
+    run_time = time.strftime('%Y-%m-%dT%H:%M:%S')
+    print('{:<14} {:<44} {:>10} {:>10} {:>9} {:>7} {:>10}'.
+          format('scale', 'operation', 'min (s)', 'median (s)', 'requests', 'api', 'previous'))
+    try:
+        with open(args.output, 'a') as output:
+            for vports, traffic_items, flows in SCALES:
+                scale = '{}/{}/{}'.format(vports, traffic_items, flows)
+                for operation, (min_time, median_time, requests_count, calls_count) in \
+                        benchmark_scale(server, vports, traffic_items, flows, args.repeat,
+                                        args.cloudshell_latency):
+                    record = {'commit': commit, 'time': run_time, 'latency': args.latency, 'scale': scale,
+                              'operation': operation, 'min': min_time, 'median': median_time,
+                              'requests': requests_count, 'api_calls': calls_count}
+                    output.write(json.dumps(record) + '\n')
+                    previous_record = previous.get((scale, operation))
+                    change = '{:+.0%}'.format(median_time / previous_record['median'] - 1) if previous_record else ''
+                    print('{:<14} {:<44} {:>10.3f} {:>10.3f} {:>9} {:>7} {:>10}'.
+                          format(scale, operation, min_time, median_time, requests_count, calls_count, change))
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
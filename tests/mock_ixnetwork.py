@@ -0,0 +1,496 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Local stand-ins for the IxNetwork REST API server and the CloudShell API, for offline driver benchmarks.
+
+IxNetwork configuration files are not parsed. The mock configuration file is JSON that describes the configuration
+scale - {"vports": 4, "traffic_items": 2, "flows": 100} - and loadconfig builds a matching object tree. The same HTTP
+server also serves the Quali API calls used to attach files to the reservation.
+"""
+
+import BaseHTTPServer
+import SocketServer
+import itertools
+import json
+import threading
+import time
+import urlparse
+
+import cloudshell.shell.core.session.cloudshell_session as cloudshell_session
+from cloudshell.shell.core.driver_context import (ResourceCommandContext, ResourceContextDetails,
+                                                  ReservationContextDetails, ConnectivityContext)
+
+SESSIONS_URL = '/api/v1/sessions'
+
+PORT_CAPTIONS = ['Stat Name', 'Port Name', 'Line Speed', 'Link State', 'Frames Tx.', 'Valid Frames Rx.',
+                 'Frames Tx. Rate', 'Valid Frames Rx. Rate', 'Bytes Tx.', 'Bytes Rx.']
+TRAFFIC_ITEM_CAPTIONS = ['Traffic Item', 'Tx Frames', 'Rx Frames', 'Frames Delta', 'Loss %', 'Tx Frame Rate',
+                         'Rx Frame Rate', 'Store-Forward Avg Latency (ns)']
+FLOW_CAPTIONS = ['Tx Port', 'Rx Port', 'Traffic Item', 'Source/Dest Value Pair', 'Tx Frames', 'Rx Frames',
+                 'Frames Delta', 'Loss %', 'Tx Frame Rate', 'Rx Frame Rate']
+
+
+class MockSession(object):
+    """ Single IxNetwork REST session - object tree, traffic state and statistics of the loaded configuration. """
+
+    # Number of cards and ports per card of each added chassis.
+    chassis_cards = 12
+    card_ports = 32
+
+    def __init__(self, session_id, server):
+        self.session_id = session_id
+        self.server = server
+        self.prefix = '{}/{}/'.format(SESSIONS_URL, session_id)
+        self.files = {}
+        self.new_config()
+
+    def new_config(self):
+        # {path: attributes}, path is relative to the session, for example ixnetwork/vport/1.
+        self.objects = {}
+        # {(parent path, child type): [child path]}
+        self.children = {}
+        self.scale = {'vports': 0, 'traffic_items': 0, 'flows': 0, 'interfaces': 0, 'quick_tests': 0}
+        self.traffic_start = None
+        self.traffic_time = 0.0
+        # {vport path: time the port state becomes up}
+        self.ports_up_time = {}
+        # Time classic interfaces gateways become resolved, None before the first ARP.
+        self.arp_resolved_time = None
+        # {quick test results path: time the quick test ends}
+        self.quick_tests_end_time = {}
+        self.objects['ixnetwork'] = {}
+        self.objects['ixnetwork/globals'] = {'buildNumber': self.server.build}
+        self.objects['ixnetwork/traffic'] = {'state': 'unapplied'}
+        self.objects['ixnetwork/statistics'] = {}
+        self.objects['ixnetwork/availableHardware'] = {}
+        self.objects['ixnetwork/quickTest'] = {}
+
+    def load_config(self, content):
+        self.new_config()
+        self.scale.update(json.loads(content))
+        for index in range(self.scale['vports']):
+            vport = self.add('ixnetwork', 'vport', name='Port {}'.format(index + 1), connectedTo='null', state='down',
+                             assignedTo='', connectionStatus='', type='ethernet')
+            for interface_index in range(self.scale['interfaces']):
+                interface = self.add(vport, 'interface', enabled='true',
+                                     description='Interface {}'.format(interface_index + 1))
+                self.add(interface, 'ipv4', ip='10.{}.{}.1'.format(index, interface_index), maskWidth=24,
+                         gateway='10.{}.{}.2'.format(index, interface_index))
+        for index in range(self.scale['traffic_items']):
+            self.add('ixnetwork/traffic', 'trafficItem', name='Traffic Item {}'.format(index + 1),
+                     trafficItemType='l2L3', enabled='true', state='unapplied')
+        for index in range(self.scale['quick_tests']):
+            quick_test = self.add('ixnetwork/quickTest', 'rfc2544throughput', name='Quick Test {}'.format(index + 1))
+            self.objects[quick_test + '/results'] = {'isRunning': 'false', 'result': '', 'resultPath': ''}
+        for caption, captions, rows in (('Port Statistics', PORT_CAPTIONS, self._port_rows),
+                                        ('Traffic Item Statistics', TRAFFIC_ITEM_CAPTIONS, self._traffic_item_rows),
+                                        ('Flow Statistics', FLOW_CAPTIONS, self._flow_rows)):
+            view = self.add('ixnetwork/statistics', 'view', caption=caption, visible='true')
+            self.objects[view + '/page'] = {'isReady': 'true', 'columnCaptions': captions, 'pageSize': 50,
+                                            'currentPage': 1, 'rows': rows}
+
+    def add(self, parent, child_type, **attributes):
+        siblings = self.children.setdefault((parent, child_type), [])
+        path = '{}/{}/{}'.format(parent, child_type, len(siblings) + 1)
+        self.objects[path] = attributes
+        siblings.append(path)
+        if child_type == 'chassis':
+            for card_id in range(1, self.chassis_cards + 1):
+                card = self.add(path, 'card', cardId=card_id, description='Mock card')
+                for port_id in range(1, self.card_ports + 1):
+                    self.add(card, 'port', portId=port_id, description='Mock port', owner='')
+        return path
+
+    #
+    # REST requests.
+    #
+
+    def get(self, path):
+        if path in self.objects:
+            return 200, self._object_json(path)
+        parent, _, child_type = path.rpartition('/')
+        if parent in self.objects:
+            return 200, [self._object_json(p) for p in self.children.get((parent, child_type), [])]
+        return 404, {'error': 'Object {} not found'.format(path)}
+
+    def options(self, path):
+        if path not in self.objects:
+            return 404, {'error': 'Object {} not found'.format(path)}
+        child_types = sorted(set(t for p, t in self.children if p == path))
+        attributes = [a for a in self._object_json(path) if a != 'links']
+        return 200, {'custom': {'children': [{'name': t} for t in child_types],
+                                'attributes': [{'name': a} for a in attributes],
+                                'operations': []}}
+
+    def patch(self, path, attributes):
+        self.objects.setdefault(path, {}).update(attributes)
+        if 'connectedTo' in attributes:
+            connected = attributes['connectedTo'] not in ('null', None)
+            self.objects[path].update(state='up' if connected else 'down',
+                                      assignedTo=attributes['connectedTo'] if connected else '',
+                                      connectionStatus=attributes['connectedTo'] if connected else '')
+            if connected:
+                self.ports_up_time[path] = time.time() + self.server.port_up_delay
+            else:
+                self.ports_up_time.pop(path, None)
+        return 200, {}
+
+    def post(self, path, query, body):
+        if path == 'ixnetwork/files':
+            self.files[query['filename'][0]] = body
+            return 200, {}
+        data = json.loads(body) if body else {}
+        if '/operations/' in path:
+            return 200, {'id': '', 'state': 'SUCCESS', 'result': self.execute(path.split('/')[-1].lower(), data)}
+        parent, _, child_type = path.rpartition('/')
+        return 201, {'links': [{'href': self.prefix + self.add(parent, child_type, **data)}]}
+
+    def execute(self, operation, data):
+        if operation == 'newconfig':
+            self.new_config()
+        elif operation == 'loadconfig':
+            self.load_config(self.files[data['arg1']])
+        elif operation in ('apply', 'start', 'stop') and '/quickTest/' in data.get('arg1', ''):
+            self._quick_test(operation, data['arg1'][len(self.prefix):] + '/results')
+        elif operation == 'sendarpall':
+            self._send_arp()
+        elif operation in ('generate', 'apply'):
+            self.objects['ixnetwork/traffic']['state'] = 'stopped'
+        elif operation == 'startstatelesstraffic':
+            self._update_traffic()
+            self.traffic_start = time.time()
+        elif operation == 'stopstatelesstraffic':
+            self._update_traffic()
+            if self.traffic_start:
+                self.traffic_time += time.time() - self.traffic_start
+                self.traffic_start = None
+        return None
+
+    def _object_json(self, path):
+        if path == 'ixnetwork/traffic':
+            self._update_traffic()
+        attributes = dict(self.objects[path])
+        if path in self.ports_up_time:
+            attributes['state'] = 'up' if time.time() >= self.ports_up_time[path] else 'down'
+        if '/discoveredNeighbor/' in path and self.arp_resolved_time and time.time() >= self.arp_resolved_time:
+            attributes['neighborMac'] = '00:00:00:00:00:02'
+        if path in self.quick_tests_end_time:
+            running = time.time() < self.quick_tests_end_time[path]
+            attributes.update(isRunning=str(running).lower(), result='' if running else 'pass')
+        if path.endswith('/page'):
+            attributes.update(self._page(attributes.pop('rows'), attributes))
+        attributes['links'] = [{'rel': 'self', 'method': 'GET', 'href': self.prefix + path}]
+        return attributes
+
+    def _quick_test(self, operation, results):
+        """ Quick test apply rewrites traffic, start runs the quick test for server.quick_test_duration seconds. """
+
+        if operation == 'apply':
+            self.objects['ixnetwork/traffic']['state'] = 'unapplied'
+        elif operation == 'start':
+            self.quick_tests_end_time[results] = time.time() + self.server.quick_test_duration
+            self.objects[results]['resultPath'] = 'C:/Results/{}'.format(results.split('/')[-2])
+        else:
+            self.quick_tests_end_time[results] = min(self.quick_tests_end_time.get(results, 0), time.time())
+
+    def _send_arp(self):
+        """ Classic interfaces gateways are discovered unresolved and become resolved after server.arp_delay. """
+
+        for (parent, child_type), children in list(self.children.items()):
+            if child_type == 'ipv4':
+                vport = parent.split('/interface')[0]
+                neighbors = self.children.get((vport, 'discoveredNeighbor'), [])
+                for ipv4 in children:
+                    gateway = self.objects[ipv4]['gateway']
+                    if gateway not in [self.objects[n]['neighborIp'] for n in neighbors]:
+                        self.add(vport, 'discoveredNeighbor', neighborIp=gateway, neighborMac='00:00:00:00:00:00')
+                        neighbors = self.children[(vport, 'discoveredNeighbor')]
+        self.arp_resolved_time = time.time() + self.server.arp_delay
+
+    #
+    # Traffic and statistics.
+    #
+
+    def _update_traffic(self):
+        """ Traffic runs for server.traffic_duration seconds after start, counters grow only while traffic runs. """
+
+        if self.traffic_start:
+            elapsed = time.time() - self.traffic_start
+            if elapsed >= self.server.traffic_duration:
+                self.traffic_time += self.server.traffic_duration
+                self.traffic_start = None
+        state = 'started' if self.traffic_start else 'stopped'
+        if self.objects['ixnetwork/traffic']['state'] != 'unapplied':
+            self.objects['ixnetwork/traffic']['state'] = state
+
+    def _tx_frames(self):
+        running = time.time() - self.traffic_start if self.traffic_start else 0
+        return int((self.traffic_time + running) * self.server.frame_rate)
+
+    def _page(self, rows, page):
+        total_rows = rows(None, None)
+        page_size = int(page['pageSize'])
+        total_pages = max((total_rows + page_size - 1) // page_size, 1)
+        current_page = min(int(page['currentPage']), total_pages)
+        start = (current_page - 1) * page_size
+        values = rows(start, min(start + page_size, total_rows))
+        return {'totalPages': total_pages, 'currentPage': current_page, 'rowCount': total_rows,
+                'pageValues': [[row] for row in values]}
+
+    def _frames(self, flows):
+        tx = self._tx_frames() * flows
+        rx = int(tx * (1 - self.server.loss))
+        rate = self.server.frame_rate * flows if self.traffic_start else 0
+        return tx, rx, rate
+
+    def _port_rows(self, start, end):
+        vports = self.children.get(('ixnetwork', 'vport'), [])
+        if start is None:
+            return len(vports)
+        rows = []
+        for path in vports[start:end]:
+            tx, rx, rate = self._frames(max(self.scale['flows'] // len(vports), 1))
+            rows.append(['Port', self.objects[path]['name'], '1000 Mbps', self.objects[path]['state'].capitalize(),
+                         str(tx), str(rx), str(rate), str(rate), str(tx * 64), str(rx * 64)])
+        return rows
+
+    def _traffic_item_rows(self, start, end):
+        traffic_items = self.children.get(('ixnetwork/traffic', 'trafficItem'), [])
+        if start is None:
+            return len(traffic_items)
+        rows = []
+        for path in traffic_items[start:end]:
+            tx, rx, rate = self._frames(max(self.scale['flows'] // len(traffic_items), 1))
+            rows.append([self.objects[path]['name'], str(tx), str(rx), str(tx - rx), _loss(tx, rx), str(rate),
+                         str(rate), '1200'])
+        return rows
+
+    def _flow_rows(self, start, end):
+        if start is None:
+            return self.scale['flows']
+        vports = [self.objects[p]['name'] for p in self.children.get(('ixnetwork', 'vport'), [])] or ['Port 1']
+        traffic_items = self.scale['traffic_items'] or 1
+        tx, rx, rate = self._frames(1)
+        rows = []
+        for flow in range(start, end):
+            rows.append([vports[flow % len(vports)], vports[(flow + 1) % len(vports)],
+                         'Traffic Item {}'.format(flow % traffic_items + 1), '10.0.{}.{}-20.0.{}.{}'.format(
+                             flow // 256, flow % 256, flow // 256, flow % 256),
+                         str(tx), str(rx), str(tx - rx), _loss(tx, rx), str(rate), str(rate)])
+        return rows
+
+
+def _loss(tx, rx):
+    return '{:.3f}'.format(100.0 * (tx - rx) / tx) if tx else '0.000'
+
+
+class MockIxNetworkServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """ IxNetwork REST API (and Quali API) server on localhost. """
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, traffic_duration=0.5, frame_rate=1000, loss=0.0, build='8.40.1124.8',
+                 port_up_delay=0.0, arp_delay=0.0, quick_test_duration=0.0):
+        """
+        :param latency: delay (seconds) added to each request.
+        :param port_up_delay: time (seconds) from port connect until the port state is up.
+        :param arp_delay: time (seconds) from send ARP until classic interfaces gateways are resolved.
+        :param quick_test_duration: time (seconds) quick test runs after start.
+        :param traffic_duration: time (seconds) traffic runs after start.
+        :param frame_rate: frames per second per flow.
+        :param loss: fraction of lost frames.
+        """
+
+        BaseHTTPServer.HTTPServer.__init__(self, ('localhost', 0), MockRequestHandler)
+        self.latency = latency
+        self.traffic_duration = traffic_duration
+        self.frame_rate = frame_rate
+        self.loss = loss
+        self.build = build
+        self.port_up_delay = port_up_delay
+        self.arp_delay = arp_delay
+        self.quick_test_duration = quick_test_duration
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+        # [(reservation ID, file name, file size)] of files attached through the Quali API.
+        self.attachments = []
+        self.requests_count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name='MockIxNetworkServer').start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def handle_request_data(self, method, url, body):
+        """ Returns (status code, JSON response) of a single request. """
+
+        with self.lock:
+            self.requests_count += 1
+        time.sleep(self.latency)
+        parsed_url = urlparse.urlparse(url)
+        path = parsed_url.path.rstrip('/')
+        if path.startswith('/API/'):
+            return self._quali_api(method, path, body)
+        if path == SESSIONS_URL:
+            if method == 'POST':
+                with self.lock:
+                    session = MockSession(next(self.session_ids), self)
+                    self.sessions[session.session_id] = session
+                return 201, {'id': session.session_id, 'links': [{'href': session.prefix.rstrip('/')}]}
+            return 200, [{'id': s} for s in self.sessions]
+        session_id, _, path = path[len(SESSIONS_URL) + 1:].partition('/')
+        session = self.sessions.get(int(session_id)) if session_id.isdigit() else None
+        if not session:
+            return 404, {'error': 'Session {} not found'.format(session_id)}
+        if method == 'DELETE' and not path:
+            self.sessions.pop(session.session_id)
+            return 200, {}
+        # Requests are processed one at a time, latency is added before so concurrent requests still overlap.
+        with self.lock:
+            if method == 'GET':
+                return session.get(path)
+            if method == 'OPTIONS':
+                return session.options(path)
+            if method == 'PATCH':
+                return session.patch(path, json.loads(body) if body else {})
+            if method == 'POST':
+                return session.post(path, urlparse.parse_qs(parsed_url.query), body)
+        return 405, {'error': 'Method {} not supported'.format(method)}
+
+    def _quali_api(self, method, path, body):
+        if path == '/API/Auth/Login':
+            return 200, 'mock-token'
+        if path == '/API/Package/AttachFileToReservation':
+            fields = _parse_multipart(body)
+            self.attachments.append((fields.get('reservationId'), fields.get('saveFileAs'),
+                                     len(fields.get('QualiPackage', ''))))
+            return 200, {}
+        return 404, {'error': 'Quali API {} not supported'.format(path)}
+
+
+class MockRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def _handle(self):
+        body = self.rfile.read(int(self.headers.get('content-length', 0)))
+        status, response = self.server.handle_request_data(self.command, self.path, body)
+        content = json.dumps(response)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = do_OPTIONS = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+def _parse_multipart(body):
+    """ Minimal multipart/form-data parser - returns {field name: value}. """
+
+    fields = {}
+    boundary = body.split('\r\n', 1)[0]
+    for part in body.split(boundary)[1:-1]:
+        headers, _, value = part.strip('\r\n').partition('\r\n\r\n')
+        name = headers.split('name="', 1)[1].split('"', 1)[0]
+        fields[name] = value
+    return fields
+
+
+class MockObject(object):
+
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class MockCloudShell(object):
+    """ CloudShell API stand-in - reservation with one chassis whose ports have Logical Names Port 1 ... Port N. """
+
+    def __init__(self, ports, latency=0.0, chassis_address='192.168.0.1'):
+        """
+        :param ports: number of ports in the reservation.
+        :param latency: delay (seconds) added to each API call.
+        """
+
+        self.latency = latency
+        self.calls_count = 0
+        self.messages = []
+        model = 'Ixia Chassis Shell 2G.GenericTrafficGeneratorPort'
+        self.ports = []
+        for index in range(ports):
+            card, port = index // MockSession.card_ports + 1, index % MockSession.card_ports + 1
+            logical_name = MockObject(Name=model + '.Logical Name', Value='Port {}'.format(index + 1))
+            self.ports.append(MockObject(Name='IxiaChassis/Module{}/Port{}'.format(card, port), ResourceModelName=model,
+                                         ResourceFamilyName='CS_TrafficGeneratorPort',
+                                         FullAddress='{}/M{}/P{}'.format(chassis_address, card, port),
+                                         ResourceAttributes=[logical_name], ChildResources=[]))
+        self.chassis = MockObject(Name='IxiaChassis', ResourceAttributes=[], ChildResources=self.ports)
+        self.original_session = None
+
+    def install(self):
+        """ Replace the CloudShell API session class used by the driver. """
+
+        self.original_session = cloudshell_session.CloudShellAPISession
+        cloudshell_session.CloudShellAPISession = lambda **kwargs: MockCloudShellAPISession(self)
+
+    def uninstall(self):
+        cloudshell_session.CloudShellAPISession = self.original_session
+
+
+class MockCloudShellAPISession(object):
+
+    def __init__(self, cloudshell):
+        self.cloudshell = cloudshell
+        self._call()
+
+    def _call(self):
+        self.cloudshell.calls_count += 1
+        time.sleep(self.cloudshell.latency)
+
+    def GetReservationDetails(self, reservation_id):
+        self._call()
+        return MockObject(ReservationDescription=MockObject(Resources=self.cloudshell.ports))
+
+    def GetResourceDetails(self, resource_name):
+        self._call()
+        return self.cloudshell.chassis
+
+    def DecryptPassword(self, password):
+        self._call()
+        return MockObject(Value=password)
+
+    def EnqueueCommand(self, **kwargs):
+        self._call()
+
+    def WriteMessageToReservationOutput(self, reservation_id, message):
+        self._call()
+        self.cloudshell.messages.append(message)
+
+
+def create_mock_context(server):
+    """ Returns command context of IxNetwork controller connected to mock server. """
+
+    attributes = {'Controller Address': 'localhost',
+                  'Controller TCP Port': str(server.port),
+                  'User': '',
+                  'Password': '',
+                  'Background Teardown': 'False'}
+    connectivity = ConnectivityContext('localhost:{}'.format(server.port), '8029', str(server.port), 'mock-token',
+                                       '9.1', 'http')
+    resource = ResourceContextDetails('mock-controller', 'IxNetwork Controller Mock', 'IxNetwork Controller Mock',
+                                      'Service', '', 'IxNetwork Controller', 'Traffic Generator Controller', '',
+                                      attributes, None, None, None, None)
+    reservation = ReservationContextDetails('Mock', 'Mock', 'Global', '', 'admin', '', 'mock-reservation')
+    return ResourceCommandContext(connectivity, resource, reservation, [])
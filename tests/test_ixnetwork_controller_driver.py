@@ -3,6 +3,7 @@
 
 from os import path
 import sys
+import json
 import unittest
 import logging
 
@@ -59,9 +60,7 @@ class TestIxNetworkControllerDriver(object):
     def test_run_traffic(self):
         self.test_load_config()
         self.driver.send_arp(self.context)
-        self.driver.start_protocols(self.context)
-        import time
-        time.sleep(8)
+        print(self.driver.start_protocols(self.context, 'True'))
         self.driver.start_traffic(self.context, 'False')
         self.driver.stop_traffic(self.context)
         stats = self.driver.get_statistics(self.context, 'Port Statistics', 'JSON')
@@ -72,6 +71,50 @@ class TestIxNetworkControllerDriver(object):
         assert(int(stats['Port 1']['Frames Tx.']) >= 2000)
         stats = self.driver.get_statistics(self.context, 'Port Statistics', 'csv')
         print(stats)
+        for attachment_format in ('GZIP', 'Columnar'):
+            summary = self.driver.get_statistics(self.context, 'Port Statistics', 'csv',
+                                                 attachment_format=attachment_format)
+            assert(summary.startswith('Port Statistics: 2 rows'))
+
+    def test_get_statistics_batch(self):
+        self.test_load_config()
+        self.driver.start_traffic(self.context, 'True')
+        stats = self.driver.get_statistics_batch(self.context, 'Port Statistics, Traffic Item Statistics', 'True')
+        assert(int(stats['Port Statistics']['Port 1']['Frames Tx.']) >= 2000)
+        assert(len(stats['Traffic Item Statistics']) >= 1)
+
+    def test_run_traffic_verdict(self):
+        self.test_load_config()
+        result = self.driver.run_traffic(self.context, '0', 'Port Statistics',
+                                         'Traffic Item Statistics: Loss % <= 100, Frames Tx. >= 2000')
+        assert(result['verdict'] == 'PASS')
+        assert(int(result['statistics']['Port Statistics']['Port 1']['Frames Tx.']) >= 2000)
+        assert(len(result['statistics']['Traffic Item Statistics']) >= 1)
+        result = self.driver.run_traffic(self.context, '2', thresholds='Port Statistics: Frames Tx. < 0')
+        assert(result['verdict'] == 'FAIL')
+        assert(len(result['failures']) == 2)
+
+    def test_all_controllers(self):
+        reservation_ports = get_reservation_resources(self.session, self.context.reservation.reservation_id,
+                                                      'Generic Traffic Generator Port',
+                                                      'PerfectStorm Chassis Shell 2G.GenericTrafficGeneratorPort',
+                                                      'Ixia Chassis Shell 2G.GenericTrafficGeneratorPort')
+        set_family_attribute(self.session, reservation_ports[0], 'Logical Name', 'Port 1')
+        set_family_attribute(self.session, reservation_ports[1], 'Logical Name', 'Port 2')
+        configs = {self.context.resource.name: path.join(path.dirname(__file__), config)}
+        print(self.driver.load_config_all(self.context, json.dumps(configs)))
+        print(self.driver.start_protocols_all(self.context, 'True'))
+        self.driver.start_traffic_all(self.context, 'True')
+        stats = self.driver.get_statistics_all(self.context, 'Port Statistics')
+        assert(int(stats['Port 1']['Frames Tx.']) >= 2000)
+        assert(stats['Port 1']['Controller'] == self.context.resource.name)
+
+    def test_metrics(self):
+        self.test_load_config()
+        metrics = self.driver.get_metrics(self.context)
+        assert(metrics['command.load_config']['count'] == 1)
+        assert(any(name.startswith('rest.') for name in metrics))
+        assert(any(name.startswith('cloudshell.') for name in metrics))
 
     def negative_tests(self):
         reservation_ports = get_reservation_resources(self.session, self.context.reservation.reservation_id,
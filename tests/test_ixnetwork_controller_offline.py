@@ -0,0 +1,305 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Driver tests against the local IxNetwork REST and CloudShell API stand-ins, no IxNetwork or CloudShell required.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from tests.mock_ixnetwork import MockIxNetworkServer, MockCloudShell, create_mock_context
+from src.driver import IxNetworkControllerDriver
+from src.ixn_session_pool import session_pool
+
+
+class TestIxNetworkControllerOffline(unittest.TestCase):
+
+    vports = 4
+    interfaces = 0
+    quick_tests = 0
+    port_up_delay = 0.0
+    arp_delay = 0.0
+    quick_test_duration = 0.0
+
+    def setUp(self):
+        self.server = MockIxNetworkServer(traffic_duration=0.2, port_up_delay=self.port_up_delay,
+                                          arp_delay=self.arp_delay,
+                                          quick_test_duration=self.quick_test_duration).start()
+        self.cloudshell = MockCloudShell(self.vports)
+        self.cloudshell.install()
+        config_file, self.config_file_name = tempfile.mkstemp(suffix='.ixncfg')
+        os.write(config_file, json.dumps({'vports': self.vports, 'traffic_items': 2, 'flows': 8,
+                                          'interfaces': self.interfaces, 'quick_tests': self.quick_tests}))
+        os.close(config_file)
+        self.context = create_mock_context(self.server)
+        self.driver = IxNetworkControllerDriver()
+        self.driver.initialize(self.context)
+
+    def tearDown(self):
+        self.driver.cleanup()
+        self.cloudshell.uninstall()
+        self.server.stop()
+        os.remove(self.config_file_name)
+
+
+class TestLoadConfig(TestIxNetworkControllerOffline):
+
+    def test_logical_names_change(self):
+        """ Logical names changed during the reservation are used by the next load of the same configuration. """
+
+        assert(self.driver.load_config(self.context, self.config_file_name).endswith('(full reload)'))
+        addresses = self._get_vports_addresses()
+        port_1, port_2 = self.cloudshell.ports[0].ResourceAttributes[0], self.cloudshell.ports[1].ResourceAttributes[0]
+        port_1.Value, port_2.Value = port_2.Value, port_1.Value
+        assert(self.driver.load_config(self.context, self.config_file_name).endswith('(partial reload)'))
+        swapped_addresses = self._get_vports_addresses()
+        assert(swapped_addresses['Port 1'] == addresses['Port 2'])
+        assert(swapped_addresses['Port 2'] == addresses['Port 1'])
+        assert(swapped_addresses['Port 3'] == addresses['Port 3'])
+        assert(self.driver.load_config(self.context, self.config_file_name).endswith('(cache hit)'))
+
+    def test_metrics(self):
+        self.driver.load_config(self.context, self.config_file_name)
+        metrics = self.driver.get_metrics(self.context)
+        assert(metrics['command.load_config']['count'] == 1)
+        assert(any(name.startswith('rest.') for name in metrics))
+
+    def _get_vports_addresses(self):
+        return {port.obj_name(): port.get_attribute('connectedTo') for port in
+                self.driver.handler.ixn.root.get_objects_by_type('vport')}
+
+
+class TestQuickTest(TestIxNetworkControllerOffline):
+
+    quick_tests = 1
+
+    def test_reload_after_quick_test(self):
+        """ Quick test changes the configuration so the next load of the same configuration is not a cache hit. """
+
+        self.driver.load_config(self.context, self.config_file_name)
+        assert(self.driver.run_quick_test(self.context, 'Quick Test 1') == 'pass')
+        assert(self.driver.load_config(self.context, self.config_file_name).endswith('(full reload)'))
+
+    def test_teardown_stops_quick_test(self):
+        """ Teardown stops the running quick test and ends the runner thread before the session is released. """
+
+        self.server.quick_test_duration = 60
+        self.driver.load_config(self.context, self.config_file_name)
+        job_id = self.driver.run_quick_test(self.context, 'Quick Test 1', 'False')
+        runner = self.driver.handler.quick_test_runner
+        status = {}
+        while status.get('progress', {}).get('isRunning') != 'true':
+            status = self.driver.get_quick_test_status(self.context, job_id)
+            assert(status['state'] in ('queued', 'running'))
+            time.sleep(0.1)
+        key, ixn = self.driver.handler.session_key, self.driver.handler.ixn.wrapped
+        self.driver.cleanup()
+        assert(not runner.is_alive())
+        assert(runner.get_job(job_id).state == 'stopped')
+        assert(ixn in [s[0] for s in session_pool.idle[key]])
+        self.driver = IxNetworkControllerDriver()
+        self.driver.initialize(self.context)
+
+
+class TestObjectTree(TestIxNetworkControllerOffline):
+
+    def test_invalidate(self):
+        """ Cached tree is dropped when traffic is regenerated and when protocols are started. """
+
+        self.driver.load_config(self.context, self.config_file_name)
+        traffic_ref = self.driver.handler.ixn.root.get_child_static('traffic').ref
+        tree = self.driver.get_object_tree(self.context, traffic_ref, '0')
+        assert(tree['attributes']['state'] == 'unapplied')
+        assert(self.driver.get_object_tree(self.context, traffic_ref, '0') is tree)
+        self.driver.apply_traffic(self.context)
+        tree = self.driver.get_object_tree(self.context, traffic_ref, '0')
+        assert(tree['attributes']['state'] == 'stopped')
+        self.driver.start_protocols(self.context)
+        assert(self.driver.get_object_tree(self.context, traffic_ref, '0') is not tree)
+
+
+class TestStatistics(TestIxNetworkControllerOffline):
+
+    def test_delta(self):
+        self.driver.load_config(self.context, self.config_file_name)
+        stats = self.driver.get_statistics(self.context, 'Port Statistics', 'JSON', mode='Delta')
+        assert(sorted(stats) == ['Port {}'.format(i + 1) for i in range(self.vports)])
+        assert(stats['Port 1']['Frames Tx. Rate'] == '0')
+        assert('Link State (delta)' not in stats['Port 1'])
+        assert(self.driver.get_statistics(self.context, 'Port Statistics', 'JSON', mode='Delta') == {})
+        self.driver.start_traffic(self.context, 'True')
+        stats = self.driver.get_statistics(self.context, 'Port Statistics', 'CSV', mode='Delta')
+        header = stats.splitlines()[0].split(',')
+        assert(len(header) == len(set(header)))
+        assert(len(stats.splitlines()) == self.vports + 1)
+
+    def test_batch(self):
+        """ Views are listed once for all views of the batch. """
+
+        self.driver.load_config(self.context, self.config_file_name)
+        session = list(self.server.sessions.values())[0]
+        session_get = session.get
+        views_lists = []
+
+        def _get(path):
+            if path == 'ixnetwork/statistics/view':
+                views_lists.append(path)
+            return session_get(path)
+        session.get = _get
+
+        view_names = ['Port Statistics', 'Traffic Item Statistics', 'Flow Statistics']
+        stats = self.driver.get_statistics_batch(self.context, ', '.join(view_names))
+        assert(sorted(stats) == sorted(view_names))
+        assert(sorted(stats['Port Statistics']) == ['Port {}'.format(i + 1) for i in range(self.vports)])
+        assert(len(views_lists) == 1)
+        self.assertRaisesRegexp(Exception, 'Statistics view "No Such View" not found', self.driver.get_statistics_batch,
+                                self.context, 'Port Statistics, No Such View')
+
+    def test_sampling(self):
+        self.driver.load_config(self.context, self.config_file_name)
+        self.driver.start_sampling(self.context, 'Port Statistics, Traffic Item Statistics', '0.05', '100')
+        self.driver.start_traffic(self.context, 'True')
+        self.driver.stop_sampling(self.context)
+        sampled_stats = self.driver.get_sampled_statistics(self.context, 'JSON')
+        assert(sorted(sampled_stats) == ['Port Statistics', 'Traffic Item Statistics'])
+        port_stats = sampled_stats['Port Statistics']
+        assert(len(port_stats['timestamps']) >= 2)
+        frames_tx = port_stats['statistics']['Port 1']['Frames Tx.']
+        assert(frames_tx['values'][-1] > frames_tx['values'][0])
+        assert(len(frames_tx['deltas']) == len(port_stats['timestamps']))
+        csv_stats = self.driver.get_sampled_statistics(self.context, 'CSV')
+        assert(csv_stats.splitlines()[0] == 'View,Object,Statistic,Time,Value,Delta,Rate')
+
+    def test_sampling_stops_on_reload(self):
+        """ Loading a different configuration stops sampling, samples taken so far are kept. """
+
+        self.driver.load_config(self.context, self.config_file_name)
+        self.driver.start_sampling(self.context, 'Port Statistics', '0.05', '100')
+        time.sleep(0.2)
+        with open(self.config_file_name, 'w') as config_file:
+            config_file.write(json.dumps({'vports': self.vports - 1, 'traffic_items': 1, 'flows': 4}))
+        assert(self.driver.load_config(self.context, self.config_file_name).endswith('(full reload)'))
+        assert(self.driver.handler.sampler is None)
+        sampled_stats = self.driver.get_sampled_statistics(self.context, 'JSON')
+        assert(len(sampled_stats['Port Statistics']['statistics']) == self.vports)
+
+    def test_run_traffic(self):
+        self.driver.load_config(self.context, self.config_file_name)
+        result = self.driver.run_traffic(self.context, '0', '', 'Traffic Item Statistics: Loss % <= 0, Frames Tx. > 0')
+        assert(result['verdict'] == 'PASS')
+        assert(sorted(result['statistics']) == ['Port Statistics', 'Traffic Item Statistics'])
+        result = self.driver.run_traffic(self.context, '0.5', 'Flow Statistics', 'Port Statistics: Frames Tx. < 0')
+        assert(result['verdict'] == 'FAIL')
+        assert(sorted(result['statistics']) == ['Flow Statistics', 'Port Statistics'])
+        assert(len(result['failures']) == self.vports)
+        self.assertRaises(Exception, self.driver.run_traffic, self.context, '0', '', 'Loss %')
+
+
+class TestReservePorts(TestIxNetworkControllerOffline):
+
+    vports = 8
+    port_up_delay = 2
+
+    def test_ports_up_overlap(self):
+        """ All ports are reserved before waiting for up, so link up of all ports overlaps. """
+
+        self.driver.handler.max_port_workers = 2
+        start_time = time.time()
+        self.driver.load_config(self.context, self.config_file_name)
+        assert(time.time() - start_time < self.port_up_delay * 2)
+
+    def test_ports_up_timeout(self):
+        self.driver.handler.ports_up_timeout = 0.5
+        self.assertRaisesRegexp(Exception, 'Port 8 on .* port is down', self.driver.load_config, self.context,
+                                self.config_file_name)
+
+
+class TestProtocols(TestIxNetworkControllerOffline):
+
+    def test_no_objects(self):
+        """ Wait for configuration without gateways/sessions says so and does not report success. """
+
+        self.driver.load_config(self.context, self.config_file_name)
+        assert('no IPv4/IPv6 gateways' in self.driver.send_arp(self.context, 'True'))
+        assert('no protocol sessions' in self.driver.start_protocols(self.context, 'True'))
+
+
+class TestClassicArp(TestIxNetworkControllerOffline):
+
+    interfaces = 2
+    arp_delay = 0.5
+
+    def test_send_arp(self):
+        self.driver.load_config(self.context, self.config_file_name)
+        self.server.arp_delay = 60
+        self.assertRaisesRegexp(Exception, '8 of 8 objects not resolved .* gateway 10.0.0.2 unresolved',
+                                self.driver.send_arp, self.context, 'True', '0.1')
+        self.server.arp_delay = self.arp_delay
+        assert(self.driver.send_arp(self.context, 'True').startswith('ARP/ND resolved after'))
+
+
+class TestSessionPool(TestIxNetworkControllerOffline):
+
+    def test_idle_expiry(self):
+        """ Released session is disconnected by the pool after idle timeout with no further driver calls. """
+
+        idle_timeout = session_pool.idle_timeout
+        session_pool.idle_timeout = 0.5
+        try:
+            self.driver.load_config(self.context, self.config_file_name)
+            key, ixn = self.driver.handler.session_key, self.driver.handler.ixn.wrapped
+            self.driver.cleanup()
+            assert([s[0] for s in session_pool.idle[key]] == [ixn])
+            time.sleep(session_pool.idle_timeout + 2)
+            assert(not session_pool.idle[key])
+            assert(ixn.root is None)
+        finally:
+            session_pool.idle_timeout = idle_timeout
+        self.driver = IxNetworkControllerDriver()
+        self.driver.initialize(self.context)
+
+    def test_one_session_per_process(self):
+        """ Second driver waits for the session of the first driver to be released. """
+
+        acquire_timeout = session_pool.acquire_timeout
+        session_pool.acquire_timeout = 0.5
+        try:
+            driver = IxNetworkControllerDriver()
+            self.assertRaisesRegexp(Exception, 'still in use', driver.initialize, self.context)
+            self.driver.handler.background_teardown = True
+            self.driver.cleanup()
+            driver.initialize(self.context)
+        finally:
+            session_pool.acquire_timeout = acquire_timeout
+        self.driver = driver
+        self.driver.load_config(self.context, self.config_file_name)
+        for port in self.driver.handler.ixn.root.get_objects_by_type('vport'):
+            assert(port.get_attribute('connectedTo').startswith(self.driver.handler.ixn.api.session))
+
+    def test_release_failure(self):
+        """ Session is discarded, and not leaked as in use, when teardown fails to release the ports. """
+
+        for background_teardown in [False, True]:
+            self.driver.load_config(self.context, self.config_file_name)
+            key, ixn = self.driver.handler.session_key, self.driver.handler.ixn.wrapped
+            self.driver.handler.background_teardown = background_teardown
+            self.driver.handler._release_ports = lambda ports: 1 / 0
+            if background_teardown:
+                self.driver.cleanup()
+                [t.join() for t in threading.enumerate() if t.name == 'IxnTearDown']
+            else:
+                self.assertRaises(ZeroDivisionError, self.driver.cleanup)
+            assert(session_pool.in_use[key] == 0)
+            assert(ixn not in [s[0] for s in session_pool.idle.get(key, [])])
+            self.driver = IxNetworkControllerDriver()
+            self.driver.initialize(self.context)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -76,6 +76,21 @@ class TestIxNetworkControllerShell(unittest.TestCase):
                                                   [InputNameValue('obj_ref', prefs_obj)])
         print('preferences attributes = {}'.format(prefs_attrs.Output))
 
+    def test_attributes_bulk(self):
+        session_id = self.session.ExecuteCommand(self.context.reservation.reservation_id, 'IxNetwork Controller',
+                                                 'Service', 'get_session_id')
+        prefs_obj = '{}ixnetwork/globals/preferences'.format(session_id.Output[1:-1])
+        set_objects = [{'obj_ref': prefs_obj, 'attributes': {'connectPortsOnLoadConfig': True}}]
+        self.session.ExecuteCommand(self.context.reservation.reservation_id, 'IxNetwork Controller',
+                                    'Service', 'set_attributes_bulk',
+                                    [InputNameValue('objects', json.dumps(set_objects))])
+        get_objects = [{'obj_ref': prefs_obj, 'attributes': ['connectPortsOnLoadConfig']}]
+        attrs = self.session.ExecuteCommand(self.context.reservation.reservation_id, 'IxNetwork Controller',
+                                            'Service', 'get_attributes_bulk',
+                                            [InputNameValue('objects', json.dumps(get_objects))])
+        print('preferences attributes = {}'.format(attrs.Output))
+        assert(json.loads(attrs.Output)[0]['attributes']['connectPortsOnLoadConfig'])
+
     def test_load_config(self):
         self._load_config(path.join(path.dirname(__file__), config))
 
@@ -99,6 +114,23 @@ class TestIxNetworkControllerShell(unittest.TestCase):
         self.session.ExecuteCommand(self.context.reservation.reservation_id, 'IxNetwork Controller', 'Service',
                                     'run_quick_test', [InputNameValue('test', 'QuickTest3')])
 
+    def test_run_quick_test_non_blocking(self):
+        self._load_config(path.join(path.dirname(__file__), 'quick_tests_840.ixncfg'))
+        job_id = self.session.ExecuteCommand(self.context.reservation.reservation_id, 'IxNetwork Controller',
+                                             'Service', 'run_quick_test',
+                                             [InputNameValue('test', 'QuickTest3'),
+                                              InputNameValue('blocking', 'False')]).Output
+        job_id = json.loads(job_id)
+        status = self.session.ExecuteCommand(self.context.reservation.reservation_id, 'IxNetwork Controller',
+                                             'Service', 'get_quick_test_status',
+                                             [InputNameValue('job_id', job_id)])
+        print('status = {}'.format(status.Output))
+        status = self.session.ExecuteCommand(self.context.reservation.reservation_id, 'IxNetwork Controller',
+                                             'Service', 'wait_quick_test',
+                                             [InputNameValue('job_id', job_id),
+                                              InputNameValue('timeout', '3600')])
+        assert(json.loads(status.Output)['state'] == 'finished')
+
     def _load_config(self, config):
         reservation_ports = get_reservation_resources(self.session, self.context.reservation.reservation_id,
                                                       'Generic Traffic Generator Port',
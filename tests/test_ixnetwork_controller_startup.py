@@ -0,0 +1,37 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from os import path
+import subprocess
+import sys
+import unittest
+
+# Maximum time (seconds) to import the driver in a new process.
+max_import_time = 2
+
+import_script = """
+import sys
+import time
+start_time = time.time()
+import src.driver
+print(time.time() - start_time)
+print(' '.join(m for m in sys.modules if m.startswith(('ixnetwork', 'trafficgenerator')) and sys.modules[m]))
+"""
+
+
+class TestIxNetworkControllerStartup(unittest.TestCase):
+
+    def test_import_time(self):
+        """ Driver cold start - import the driver in a new process, as CloudShell does for each resource. """
+
+        output = subprocess.check_output([sys.executable, '-c', import_script],
+                                         cwd=path.dirname(path.dirname(path.abspath(__file__))))
+        import_time, heavy_modules = (output.splitlines() + [''])[:2]
+        print('driver import time = {:.3f} seconds'.format(float(import_time)))
+        assert(float(import_time) < max_import_time)
+        # IxNetwork and statistics modules are imported on first use.
+        assert(not heavy_modules)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -0,0 +1,166 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests of the statistics processing functions, no IxNetwork required.
+"""
+
+import io
+import logging
+import sys
+import threading
+import unittest
+
+from src import ixn_statistics
+from src.ixn_sampler import StatsRingBuffer, StatsSampler
+
+PORT_CAPTIONS = ['Stat Name', 'Link State', 'Frames Tx.', 'Frames Tx. Rate', 'Store-Forward Avg Latency (ns)']
+
+
+def _port_row(frames, rate, latency=''):
+    return {'Stat Name': 'Port', 'Link State': 'Up', 'Frames Tx.': str(frames), 'Frames Tx. Rate': str(rate),
+            'Store-Forward Avg Latency (ns)': latency}
+
+
+class TestDeltaStats(unittest.TestCase):
+
+    def test_captions(self):
+        """ Deltas and rates only for numeric statistics, without clashing with IxNetwork '... Rate' captions. """
+
+        captions, rows = ixn_statistics.delta_stats([('Port 1', _port_row(10, 5))], PORT_CAPTIONS, None, 100.0, {})
+        numeric = ['Frames Tx.', 'Frames Tx. Rate', 'Store-Forward Avg Latency (ns)']
+        assert(captions == PORT_CAPTIONS + [c + ' (delta)' for c in numeric] + [c + ' (rate/s)' for c in numeric])
+        assert(len(set(captions)) == len(captions))
+        name, row = list(rows)[0]
+        assert(row['Frames Tx. Rate'] == '5')
+        assert(row['Frames Tx. (delta)'] == '')
+        assert('Stat Name (delta)' not in row)
+
+    def test_deltas_and_rates(self):
+        snapshot = {}
+        stats = [('Port 1', _port_row(10, 5)), ('Port 2', _port_row(20, 5))]
+        _, rows = ixn_statistics.delta_stats(stats, PORT_CAPTIONS, None, 100.0, snapshot)
+        assert(len(list(rows)) == 2)
+
+        new_snapshot = {}
+        stats = [('Port 1', _port_row(30, 5, '800')), ('Port 2', _port_row(20, 5)), ('Port 3', _port_row(1, 1))]
+        _, rows = ixn_statistics.delta_stats(stats, PORT_CAPTIONS, (100.0, snapshot), 102.0, new_snapshot)
+        rows = dict(rows)
+        # Port 2 did not change, Port 3 is new.
+        assert(sorted(rows) == ['Port 1', 'Port 3'])
+        assert(rows['Port 1']['Frames Tx. (delta)'] == 20)
+        assert(rows['Port 1']['Frames Tx. (rate/s)'] == 10)
+        assert(rows['Port 1']['Frames Tx. Rate (delta)'] == 0)
+        assert(rows['Port 1']['Store-Forward Avg Latency (ns) (delta)'] == '')
+        assert(rows['Port 3']['Frames Tx. (delta)'] == '')
+        assert(new_snapshot['Port 2'] == {'Frames Tx.': 20, 'Frames Tx. Rate': 5})
+
+    def test_empty_view(self):
+        captions, rows = ixn_statistics.delta_stats([], PORT_CAPTIONS, None, 100.0, {})
+        assert(captions == PORT_CAPTIONS)
+        assert(list(rows) == [])
+
+    def test_csv(self):
+        captions, rows = ixn_statistics.delta_stats([('Port 1', _port_row(10, 5))], PORT_CAPTIONS, None, 100.0, {})
+        output = io.BytesIO()
+        assert(ixn_statistics.write_stats_csv(output, captions, rows) == 1)
+        header = output.getvalue().splitlines()[0].split(',')
+        assert(header == captions)
+
+
+class TestStatsRingBuffer(unittest.TestCase):
+
+    def test_series(self):
+        buffer = StatsRingBuffer(10, 1024 * 1024)
+        buffer.add(100.0, [('Port 1', _port_row(10, 5))])
+        buffer.add(102.0, [('Port 1', _port_row(30, 5)), ('Port 2', _port_row(1, 1))])
+        timestamps, series = buffer.get_series()
+        assert(timestamps == [100.0, 102.0])
+        # Only numeric statistics are sampled.
+        assert(('Port 1', 'Link State') not in series)
+        assert(series[('Port 1', 'Frames Tx.')] == ([10, 30], [None, 20], [None, 10]))
+        # Port 2 was missing from the first sample.
+        assert(series[('Port 2', 'Frames Tx.')] == ([None, 1], [None, None], [None, None]))
+
+    def test_overwrite_oldest(self):
+        buffer = StatsRingBuffer(3, 1024 * 1024)
+        for sample in range(5):
+            buffer.add(100.0 + sample, [('Port 1', _port_row(sample * 10, 0))])
+        timestamps, series = buffer.get_series()
+        assert(timestamps == [102.0, 103.0, 104.0])
+        assert(series[('Port 1', 'Frames Tx.')][0] == [20, 30, 40])
+        assert(series[('Port 1', 'Frames Tx.')][1] == [None, 10, 10])
+
+    def test_memory_cap(self):
+        """ The number of samples is reduced so all series fit into the memory cap. """
+
+        buffer = StatsRingBuffer(1000, 8 * 3 * 10)
+        buffer.add(100.0, [('Port 1', {'Frames Tx.': '1', 'Frames Rx.': '1'})])
+        assert(buffer.size == 10)
+        for sample in range(20):
+            buffer.add(101.0 + sample, [('Port 1', {'Frames Tx.': '1', 'Frames Rx.': '1'})])
+        timestamps, series = buffer.get_series()
+        assert(len(timestamps) == 10)
+        assert(len(series[('Port 1', 'Frames Rx.')][0]) == 10)
+
+
+class TestStatsSampler(unittest.TestCase):
+
+    def test_sampling(self):
+        samples = []
+        sampled = threading.Event()
+
+        def _read_view(view_name):
+            samples.append(view_name)
+            if len(samples) >= 6:
+                sampled.set()
+            if view_name == 'Bad View':
+                raise Exception('view not found')
+            return [('Port 1', _port_row(len(samples), 0))]
+
+        buffers = {'Port Statistics': StatsRingBuffer(100, 1024 * 1024), 'Bad View': StatsRingBuffer(100, 1024 * 1024)}
+        sampler = StatsSampler(_read_view, ['Port Statistics', 'Bad View'], 0.01, buffers, logging.getLogger())
+        sampler.start()
+        assert(sampled.wait(5))
+        sampler.stop()
+        assert(not sampler.is_alive())
+        timestamps, series = buffers['Port Statistics'].get_series()
+        assert(len(timestamps) >= 3)
+        assert(all(d > 0 for d in series[('Port 1', 'Frames Tx.')][1][1:]))
+        # A failing view does not stop sampling of the other views.
+        assert(buffers['Bad View'].get_series() == ([], {}))
+
+
+class TestThresholds(unittest.TestCase):
+
+    statistics = {'Traffic Item Statistics': {'Traffic Item 1': {'Loss %': '0.000', 'Rx Frames': '100'},
+                                              'Traffic Item 2': {'Loss %': '2.500', 'Rx Frames': '0'}},
+                  'Port Statistics': {'Port 1': {'Frames Tx.': '100', 'Link State': 'Up'}}}
+
+    def test_parse(self):
+        thresholds = ixn_statistics.parse_thresholds(['Traffic Item Statistics: Loss % <= 0.1', 'Rx Frames>0',
+                                                      'Frames Tx. != 5'])
+        assert(thresholds == [('Traffic Item Statistics', 'Loss %', '<=', 0.1), (None, 'Rx Frames', '>', 0),
+                              (None, 'Frames Tx.', '!=', 5)])
+        for bad_threshold in ('Loss %', 'Loss % <= high', '<= 1'):
+            self.assertRaises(Exception, ixn_statistics.parse_thresholds, [bad_threshold])
+
+    def test_check(self):
+        thresholds = ixn_statistics.parse_thresholds(['Traffic Item Statistics: Loss % <= 0.1', 'Rx Frames > 0'])
+        failures = ixn_statistics.check_thresholds(thresholds, self.statistics)
+        assert(failures == ['Traffic Item Statistics/Traffic Item 2: Loss % = 2.500, expected <= 0.1',
+                            'Traffic Item Statistics/Traffic Item 2: Rx Frames = 0, expected > 0'])
+        thresholds = ixn_statistics.parse_thresholds(['Frames Tx. >= 100', 'Loss % < 5'])
+        assert(ixn_statistics.check_thresholds(thresholds, self.statistics) == [])
+
+    def test_check_missing_and_not_numeric(self):
+        thresholds = ixn_statistics.parse_thresholds(['Port Statistics: Loss % <= 0.1', 'Latency < 10',
+                                                      'Link State == 1'])
+        failures = ixn_statistics.check_thresholds(thresholds, self.statistics)
+        assert(failures == ['Port Statistics: Loss % not found, expected <= 0.1',
+                            'all views: Latency not found, expected < 10',
+                            'Port Statistics/Port 1: Link State = Up, expected == 1'])
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())